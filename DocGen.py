@@ -1,15 +1,31 @@
-import win32com.client
 import time
+
+# Startup timing reference, taken before any other import
+STARTUP_BEGIN = time.perf_counter()
+
 import tkinter as tk
 from tkinter import messagebox, scrolledtext
-import pandas as pd
 import os
 from tkinter import filedialog
-import openpyxl
 from tkinter import ttk
 import sys
-import shutil
+import multiprocessing
+import queue
+import threading
+import logging
+import logging.handlers
+from collections import deque
 from datetime import datetime
+# pandas/openpyxl (docgen_sheet) and win32com are heavy, so they are only
+# imported when a sheet is loaded or Word generation starts
+from docgen_render import RENDERERS, available_renderers, default_template_path
+from docgen_manifest import file_digest
+from docgen_metrics import RunMetrics
+from docgen_paths import user_data_dir
+from docgen_pipeline import (
+    DEFAULT_WORKERS, ArchiveWriter, GenerationControl, OutputPathIndex, build_jobs_for_dates, dates_label, render_jobs,
+    render_merged, render_pdf
+)
 
 # Hide console window on Windows
 if sys.platform == "win32":
@@ -43,6 +59,58 @@ except ImportError:
     TkinterDnD = tk.Tk  # Fallback to regular Tk
     DND_FILES = None
 
+# How often the UI drains events from the generation thread
+EVENT_POLL_MS = 50
+
+# Upper bound on progress bar redraws during a run
+PROGRESS_UPDATES_PER_SECOND = 10
+
+# Lines kept in the status area; the full log goes to the log file
+STATUS_LOG_LINES = 1000
+
+# Rotating log file: size of each file and number of old files kept
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+# Output choices: separate .docx files, PDFs, zip archives grouped as
+# named, or one merged document per room
+OUTPUT_MODES = {
+    "Word files": None,
+    "PDF files": "pdf",
+    "One ZIP": "single",
+    "ZIP per centre": "centre",
+    "ZIP per room": "room",
+    "Merged per room": "merged"
+}
+
+LOG_LEVELS = {
+    "info": logging.INFO,
+    "success": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR
+}
+
+
+def open_log_file():
+    """Logger writing to a rotating DocGen.log in the user's app data folder, or None if it cannot be created"""
+    log_dir = user_data_dir("logs")
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, "DocGen.log"),
+            maxBytes=LOG_FILE_MAX_BYTES,
+            backupCount=LOG_FILE_BACKUPS,
+            encoding="utf-8"
+        )
+    except OSError:
+        return None
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger = logging.getLogger("docgen")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(handler)
+    return logger
+
 
 class RoundedFrame(tk.Canvas):
     """A modern frame with smooth rounded corners and optional shadow"""
@@ -177,11 +245,35 @@ class DocumentGeneratorApp:
         
         # Date variables - will be set from calendar
         self.selected_date = self.today
+        self.selected_dates = [self.today]
+        
+        # Rendering backend and number of worker processes
+        self.renderer_name = None
+        self.workers_var = None
+        self.skip_current_var = None
+        self.output_mode_var = None
+        
+        # Background generation: events from the worker thread and its controls
+        self.events = queue.Queue()
+        self.control = None
+        self.pending_progress = None
+        self.last_progress_draw = 0.0
         
-        # Status text widget
+        # Timings of loading the current sheet and of the last run
+        self.load_metrics = None
+        self.metrics = None
+        
+        # Rows of the current sheet that failed validation: (row, student, error)
+        self.row_errors = []
+        
+        # Status text widget, messages waiting to be drawn in it, and the log file
         self.status_text = None
+        self.status_buffer = deque(maxlen=STATUS_LOG_LINES)
+        self.status_flush_pending = False
+        self.log_file = open_log_file()
         self.calendar_widget = None
         self.date_entry = None  # For fallback when calendar not available
+        self.end_date_entry = None  # Optional last date of a multi-day batch
         
         self.setup_ui()
     
@@ -440,6 +532,100 @@ class DocumentGeneratorApp:
                 fg="#e74c3c"
             ).pack(side=tk.LEFT, padx=10)
         
+        # Optional end date: every day from the selected date through it is generated in one run
+        range_frame = tk.Frame(date_frame, bg="#2d2d2d")
+        range_frame.pack(pady=(0, 5))
+        tk.Label(range_frame, text="Through (optional, YYYY-MM-DD):", font=("Arial", 10), bg="#2d2d2d", fg="#e0e0e0").pack(side=tk.LEFT, padx=5)
+        self.end_date_entry = tk.Entry(range_frame, font=("Arial", 10), width=15, bg="#353535", fg="#e0e0e0", insertbackground="#e0e0e0")
+        self.end_date_entry.pack(side=tk.LEFT, padx=5)
+        
+        # Rendering engine selection
+        engine_frame = tk.Frame(main_frame, bg="#1e1e1e")
+        engine_frame.pack(pady=(5, 0))
+        
+        tk.Label(
+            engine_frame,
+            text="Engine:",
+            font=("Arial", 10),
+            bg="#1e1e1e",
+            fg="#d0d0d0"
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.renderer_name = tk.StringVar(value=available_renderers()[0])
+        for name in available_renderers():
+            tk.Radiobutton(
+                engine_frame,
+                text=RENDERERS[name].label,
+                variable=self.renderer_name,
+                value=name,
+                font=("Arial", 10),
+                bg="#1e1e1e",
+                fg="#e0e0e0",
+                selectcolor="#3a4a5c",
+                activebackground="#1e1e1e",
+                activeforeground="#e0e0e0",
+                highlightthickness=0
+            ).pack(side=tk.LEFT, padx=5)
+        
+        tk.Label(
+            engine_frame,
+            text="Workers:",
+            font=("Arial", 10),
+            bg="#1e1e1e",
+            fg="#d0d0d0"
+        ).pack(side=tk.LEFT, padx=(15, 5))
+        
+        self.workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        tk.Spinbox(
+            engine_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.workers_var,
+            width=3,
+            font=("Arial", 10),
+            bg="#353535",
+            fg="#e0e0e0",
+            buttonbackground="#3a4a5c",
+            insertbackground="#e0e0e0",
+            relief=tk.FLAT
+        ).pack(side=tk.LEFT)
+        
+        # Re-runs only render new or changed rows unless this is unticked
+        self.skip_current_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            engine_frame,
+            text="Skip up-to-date",
+            variable=self.skip_current_var,
+            font=("Arial", 10),
+            bg="#1e1e1e",
+            fg="#e0e0e0",
+            selectcolor="#3a4a5c",
+            activebackground="#1e1e1e",
+            activeforeground="#e0e0e0",
+            highlightthickness=0
+        ).pack(side=tk.LEFT, padx=(15, 0))
+        
+        # Output as separate files or zip archives
+        output_frame = tk.Frame(main_frame, bg="#1e1e1e")
+        output_frame.pack(pady=(5, 0))
+        
+        tk.Label(
+            output_frame,
+            text="Output:",
+            font=("Arial", 10),
+            bg="#1e1e1e",
+            fg="#d0d0d0"
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.output_mode_var = tk.StringVar(value=next(iter(OUTPUT_MODES)))
+        ttk.Combobox(
+            output_frame,
+            textvariable=self.output_mode_var,
+            values=list(OUTPUT_MODES),
+            state="readonly",
+            width=16
+        ).pack(side=tk.LEFT)
+        
         # Generate button - Modern rounded button
         self.generate_btn_frame = self.create_rounded_button(
             main_frame,
@@ -454,6 +640,54 @@ class DocumentGeneratorApp:
         self.generate_btn = self.generate_btn_frame.winfo_children()[0]  # Get the actual button
         self.generate_btn.config(font=("Arial", 12, "bold"), padx=35, pady=14, state=tk.DISABLED)
         
+        # Pause and cancel buttons for a running batch
+        run_controls = tk.Frame(main_frame, bg="#1e1e1e")
+        run_controls.pack(pady=(0, 15))
+        
+        pause_btn_frame = self.create_rounded_button(
+            run_controls,
+            text="Pause",
+            command=self.toggle_pause,
+            radius=10,
+            side=tk.LEFT,
+            padx=5
+        )
+        self.pause_btn = pause_btn_frame.winfo_children()[0]
+        self.pause_btn.config(font=("Arial", 10, "bold"), padx=20, pady=6, state=tk.DISABLED)
+        
+        cancel_btn_frame = self.create_rounded_button(
+            run_controls,
+            text="Cancel",
+            command=self.cancel_generation,
+            radius=10,
+            side=tk.LEFT,
+            padx=5
+        )
+        self.cancel_btn = cancel_btn_frame.winfo_children()[0]
+        self.cancel_btn.config(font=("Arial", 10, "bold"), padx=20, pady=6, state=tk.DISABLED)
+        
+        report_btn_frame = self.create_rounded_button(
+            run_controls,
+            text="Export Report",
+            command=self.export_report,
+            radius=10,
+            side=tk.LEFT,
+            padx=5
+        )
+        self.report_btn = report_btn_frame.winfo_children()[0]
+        self.report_btn.config(font=("Arial", 10, "bold"), padx=20, pady=6, state=tk.DISABLED)
+        
+        row_errors_btn_frame = self.create_rounded_button(
+            run_controls,
+            text="Export Row Errors",
+            command=self.export_row_errors,
+            radius=10,
+            side=tk.LEFT,
+            padx=5
+        )
+        self.row_errors_btn = row_errors_btn_frame.winfo_children()[0]
+        self.row_errors_btn.config(font=("Arial", 10, "bold"), padx=20, pady=6, state=tk.DISABLED)
+        
         # Step 3: Status and Progress Frame - Modern card style with rounded corners and soft shadow
         status_frame_container = RoundedFrame(main_frame, bg_color="#2d2d2d", radius=15,
                                              border_color="#3a3a3a", border_width=1,
@@ -552,30 +786,54 @@ class DocumentGeneratorApp:
         self.log_status("Welcome! Please select a master sheet file to begin.", "info")
         
     def log_status(self, message, msg_type="info"):
-        """Add a message to the status text area with modern styling"""
-        if self.status_text:
-            self.status_text.config(state=tk.NORMAL)
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            
-            # Determine icon and tag based on message type
-            icons = {
-                "info": "ℹ",
-                "success": "✓",
-                "error": "✗",
-                "warning": "⚠"
-            }
+        """Queue a message for the status area, drawn in batches by flush_status_log, and write it to the log file"""
+        if self.log_file:
+            self.log_file.log(LOG_LEVELS.get(msg_type, logging.INFO), message)
+        self.status_buffer.append((datetime.now().strftime("%H:%M:%S"), message, msg_type))
+        if self.status_text and not self.status_flush_pending:
+            self.status_flush_pending = True
+            self.root.after_idle(self.flush_status_log)
+    
+    def flush_status_log(self):
+        """Draw the buffered messages, keeping only the last STATUS_LOG_LINES lines"""
+        self.status_flush_pending = False
+        if not self.status_buffer:
+            return
+        
+        # Determine icon and tag based on message type
+        icons = {
+            "info": "ℹ",
+            "success": "✓",
+            "error": "✗",
+            "warning": "⚠"
+        }
+        segments = []
+        for timestamp, message, msg_type in self.status_buffer:
             icon = icons.get(msg_type, "•")
-            
-            # Insert timestamp
-            self.status_text.insert(tk.END, f"[{timestamp}] ", "timestamp")
-            
-            # Insert icon and message with appropriate tag
-            self.status_text.insert(tk.END, f"{icon} ", msg_type)
-            self.status_text.insert(tk.END, f"{message}\n", msg_type)
-            
-            self.status_text.see(tk.END)
-            self.status_text.config(state=tk.DISABLED)
-            self.root.update()
+            segments += [f"[{timestamp}] ", "timestamp", f"{icon} {message}\n", msg_type]
+        self.status_buffer.clear()
+        
+        self.status_text.config(state=tk.NORMAL)
+        self.status_text.insert(tk.END, *segments)
+        
+        # Drop the oldest lines beyond the cap
+        lines = int(self.status_text.index("end-1c").split(".")[0]) - 1
+        if lines > STATUS_LOG_LINES:
+            self.status_text.delete("1.0", f"{lines - STATUS_LOG_LINES + 1}.0")
+        
+        self.status_text.see(tk.END)
+        self.status_text.config(state=tk.DISABLED)
+    
+    def report_startup(self, imports_done, ui_built):
+        """Log how long it took from launch until the window was shown"""
+        shown = time.perf_counter()
+        self.log_status(
+            f"Started in {shown - STARTUP_BEGIN:.2f}s "
+            f"(imports {imports_done - STARTUP_BEGIN:.2f}s, "
+            f"interface {ui_built - imports_done:.2f}s, "
+            f"first draw {shown - ui_built:.2f}s)",
+            "info"
+        )
     
     def update_progress(self, value, label_text=None):
         """Update progress bar and label"""
@@ -583,7 +841,6 @@ class DocumentGeneratorApp:
         if label_text:
             self.progress_label.config(text=label_text)
         self.progress_percent.config(text=f"{int(value)}%")
-        self.root.update()
     
     def on_file_drop(self, event):
         """Handle file drop event"""
@@ -610,18 +867,29 @@ class DocumentGeneratorApp:
             self.log_status(f"Loading file: {file_name}", "info")
             
             # Read the file
-            if file_path.endswith(".xlsx") or file_path.endswith(".xls"):
-                self.df = pd.read_excel(file_path, header=1)
-            elif file_path.endswith(".csv"):
-                self.df = pd.read_csv(file_path, header=1)
-            else:
+            from docgen_cache import SheetCache, load_master_sheet_cached
+            from docgen_sheet import SUPPORTED_EXTENSIONS, row_errors
+            
+            if not file_path.endswith(SUPPORTED_EXTENSIONS):
                 messagebox.showerror("Error", "Unsupported file format. Please select an Excel or CSV file.")
                 self.log_status("Unsupported file format.", "error")
                 return
             
-            # Initialize dataframe
-            self.df = self.initialize_df(self.df)
-            self.log_status(f"Master sheet loaded successfully! ({len(self.df)} records found)", "success")
+            # Read and initialize dataframe, or reuse it from the sheet cache,
+            # timing each step for the run report
+            self.load_metrics = RunMetrics()
+            self.df, cached = load_master_sheet_cached(file_path, SheetCache(), self.load_metrics)
+            source = ", from cache" if cached else ""
+            self.log_status(f"Master sheet loaded successfully! ({len(self.df)} records found{source})", "success")
+            
+            # Invalid rows are reported now and skipped at generation
+            self.row_errors = row_errors(self.df)
+            if self.row_errors:
+                self.log_status(
+                    f"{len(self.row_errors)} row(s) failed validation and will be skipped; "
+                    "use Export Row Errors for the list", "warning"
+                )
+            self.row_errors_btn.config(state=tk.NORMAL if self.row_errors else tk.DISABLED)
             self.generate_btn.config(state=tk.NORMAL)
             
         except Exception as e:
@@ -652,152 +920,273 @@ class DocumentGeneratorApp:
                 messagebox.showerror("Error", f"Invalid date format. Please use YYYY-MM-DD: {str(e)}")
                 return
         
+        # Through date: generate every day of the range in one run
+        from docgen_sheet import date_range
+        end_date_str = self.end_date_entry.get().strip() if self.end_date_entry else ""
+        try:
+            if end_date_str:
+                self.selected_dates = date_range(self.selected_date, datetime.strptime(end_date_str, "%Y-%m-%d"))
+            else:
+                self.selected_dates = [self.selected_date]
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid end date. Please use YYYY-MM-DD on or after the selected date: {str(e)}")
+            return
+        
         day = self.selected_date.day
         month = self.selected_date.month
         year = self.selected_date.year
         
-        # Disable generate button
-        self.generate_btn.config(state=tk.DISABLED)
+        # Select output directory
+        self.log_status("Please select the output directory...", "info")
+        output_file = filedialog.askdirectory(title="Select Output Directory")
         
-        # Update dataframe with selected date
-        self.df['Day'] = day
-        self.df['Month'] = month
-        self.df['Year'] = year
+        if not output_file:
+            self.log_status("Generation cancelled: No output directory selected.", "warning")
+            return
         
-        month_map = {
-            1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun",
-            7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"
-        }
-        self.df['Month'] = self.df['Month'].map(month_map)
+        self.output_directory = output_file
+        self.log_status(f"Output directory: {output_file}", "success")
+        
+        # Template file path
+        template_file = default_template_path()
         
-        self.log_status(f"Starting document generation for {year}-{month:02d}-{day:02d}...", "info")
-        self.log_status(f"Processing {len(self.df)} documents...", "info")
+        if not os.path.exists(template_file):
+            messagebox.showerror("Error", f"Template file not found at {template_file}")
+            self.log_status(f"Template file not found at {template_file}", "error")
+            return
+        
+        # Disable generate button
+        self.generate_btn.config(state=tk.DISABLED)
+        
+        # The date columns are stamped per date while planning
+        if len(self.selected_dates) > 1:
+            last = self.selected_dates[-1]
+            self.log_status(
+                f"Starting document generation for {year}-{month:02d}-{day:02d} through {last:%Y-%m-%d} "
+                f"({len(self.selected_dates)} dates)...", "info"
+            )
+        else:
+            self.log_status(f"Starting document generation for {year}-{month:02d}-{day:02d}...", "info")
+        self.log_status(f"Processing {len(self.df) * len(self.selected_dates)} documents...", "info")
         self.update_progress(0, "Initializing...")
         
-        # Run generation in a separate thread-like manner
-        self.root.after(100, lambda: self.generate_document(self.df))
+        # Run generation on a background thread; the UI polls its events
+        self.control = GenerationControl()
+        self.metrics = RunMetrics()
+        if self.load_metrics:
+            self.metrics.merge(self.load_metrics)
+        self.report_btn.config(state=tk.DISABLED)
+        self.set_run_controls(True)
+        worker = threading.Thread(
+            target=self.generate_document,
+            args=(self.df, output_file, template_file, self.renderer_name.get(), self.workers_var.get(),
+                  not self.skip_current_var.get(), OUTPUT_MODES[self.output_mode_var.get()], self.selected_dates),
+            daemon=True
+        )
+        worker.start()
+        self.root.after(EVENT_POLL_MS, self.poll_events)
     
-    def generate_document(self, df):
-        """Generate documents from the dataframe"""
+    def generate_document(self, df, output_file, template_file, renderer_name, workers, force=False,
+                          output_mode=None, dates=None):
+        """Generate documents from the dataframe for each date (runs on a background thread)"""
+        dates = dates or [self.selected_date]
+        archive = None
+        merging = output_mode == "merged"
+        archive_group = output_mode if output_mode in ArchiveWriter.GROUPS else None
         try:
-            # Select output directory
-            self.log_status("Please select the output directory...", "info")
-            output_file = filedialog.askdirectory(title="Select Output Directory")
+            # Plan output paths for every row, skipping documents already up to date
+            metrics = self.metrics
+            with metrics.time("plan"):
+                if merging:
+                    paths = OutputPathIndex(output_file, metrics=metrics)
+                elif archive_group:
+                    # Paths only name entries inside the archives
+                    paths = OutputPathIndex(output_file, metrics=metrics, create_folders=False)
+                else:
+                    paths = OutputPathIndex(output_file, file_digest(template_file), force, metrics,
+                                            extension=".pdf" if output_mode == "pdf" else ".docx")
+                jobs, skipped = build_jobs_for_dates(df, dates, output_file, paths)
+            metrics.count("rows_skipped", len(skipped))
+            metrics.count("up_to_date", paths.up_to_date)
+            for row_number, student, error in skipped:
+                self.post_status(f"Skipping row {row_number} ({student or 'no name'}): {error}", "warning")
+            if paths.up_to_date:
+                self.post_status(f"{paths.up_to_date} document(s) already up to date, not regenerated", "info")
             
-            if not output_file:
-                self.log_status("Generation cancelled: No output directory selected.", "warning")
-                self.generate_btn.config(state=tk.NORMAL)
-                return
-            
-            self.output_directory = output_file
-            self.log_status(f"Output directory: {output_file}", "success")
-            
-            # Open Microsoft Word application
-            self.log_status("Opening Microsoft Word...", "info")
-            word = win32com.client.Dispatch("Word.Application")
-            word.Visible = False
-            
-            # Template file path
-            if getattr(sys, 'frozen', False):
-                template_file = os.path.join(sys._MEIPASS, "template.docx")
+            if merging:
+                self.post_status("Merging cover sheets into one document per room...", "info")
+            elif output_mode == "pdf":
+                self.post_status(f"Converting to PDF with LibreOffice ({workers} at a time)...", "info")
             else:
-                template_file = r"C:\Users\agraw\OneDrive\Desktop\CODE\Work\template.docx"
+                self.post_status(f"Opening {RENDERERS[renderer_name].label} engine ({workers} worker(s))...", "info")
             
-            if not os.path.exists(template_file):
-                messagebox.showerror("Error", f"Template file not found at {template_file}")
-                self.log_status(f"Template file not found at {template_file}", "error")
-                word.Quit()
-                self.generate_btn.config(state=tk.NORMAL)
-                return
-            
-            output_file_copy = output_file
             progress_counter = 0
-            total_rows = len(df)
+            total_rows = len(jobs)
             
-            self.log_status("Generating documents...", "info")
-            self.update_progress(0, "Generating...")
-
-            for index, row in df.iterrows():
-                # Copy template
-                temp_template_path = os.path.join(output_file, "temp_template.docx")
-                temp_template_path = os.path.abspath(os.path.normpath(temp_template_path))
-                shutil.copy(template_file, temp_template_path)
-                
-                if not os.path.exists(temp_template_path):
-                    self.log_status(f"Temporary template file not found at {temp_template_path}", "error")
-                    continue
-                
-                # Open document
-                output_file = output_file_copy
-                try:
-                    doc = word.Documents.Open(temp_template_path)
-                except Exception as e:
-                    self.log_status(f"Error opening file: {e}", "error")
-                    continue
-                
-                # Prepare replacements
-                name = f"{row['Student']}"
-                id = str(row['ID'])
-                date = f"{row['Month']} {row['Day']:02d}, {row['Year']}"
-                course = f"{row['Course_Name']} {row['Course_Code']} {row['Course_Section']}"
-                
-                if not name or not id or not date:
-                    self.log_status(f"Skipping row {index + 1}: Missing required fields", "warning")
-                    doc.Close()
-                    continue
-                
-                output_file = self.output_file_generator(row["Month"], row["Year"], row["Centre"], row["Room"], output_file, row["Day"])
-                
-                # Replace content
-                replacements = {"{{Name}}": name, "{{ID}}": id, "{{Date}}": date, "{{Course}}": course}
-                self.replace_table_cell_content_in_header(doc, replacements)
-                
-                # Build filename
-                first_name = row['First_Name']
-                last_name_initial = row['Last_Name'][0] if isinstance(row['Last_Name'], str) and len(row['Last_Name']) > 0 else ''
-                file_name = f"{first_name}.{last_name_initial}.{row['Month']}.{row['Day']}.{row['Year']}.{row['Course_Name']}.{row['Course_Code']}.{row['Course_Section']}.docx"
-                output_file_with_timestamp = os.path.join(output_file, file_name)
-                
-                # Handle duplicates
-                counter = 1
-                original_output_file = output_file_with_timestamp
-                while os.path.exists(output_file_with_timestamp):
-                    output_file_with_timestamp = f"{original_output_file[:-5]}_{counter}.docx"
-                    counter += 1
-                
-                # Update progress
+            self.post_status("Generating documents...", "info")
+            self.post_progress(0, "Generating...")
+            
+            def on_result(job, error):
+                nonlocal progress_counter
+                file_name = os.path.basename(job.output_path)
                 progress_counter += 1
                 progress = (progress_counter / total_rows) * 100
-                self.update_progress(progress, f"Processing {progress_counter}/{total_rows}...")
-                
-                # Save document
-                try:
-                    doc.SaveAs(output_file_with_timestamp, FileFormat=16)
-                    self.log_status(f"Saved: {file_name} ({progress_counter}/{total_rows})", "success")
-                except Exception as e:
-                    self.log_status(f"Error saving file {file_name}: {e}", "error")
-                finally:
-                    doc.Close()
-                
-                # Delete temporary template
-                if os.path.exists(temp_template_path):
-                    os.remove(temp_template_path)
-
-            # Quit Word
-            word.Quit()
+                self.post_progress(progress, f"Processing {progress_counter}/{total_rows}...")
+                if error is None:
+                    paths.complete(job.output_path)
+                    # Merged runs report each merged file instead
+                    if not merging:
+                        self.post_status(f"Saved: {file_name} ({progress_counter}/{total_rows})", "success")
+                else:
+                    self.post_status(f"Error saving file {file_name}: {error}", "error")
             
-            self.log_status(f"Successfully generated {progress_counter} documents!", "success")
+            if archive_group:
+                archive = ArchiveWriter(output_file, archive_group, f"Cover Sheets {dates_label(dates)}")
+            try:
+                if output_mode == "pdf":
+                    written = render_pdf(jobs, template_file, workers, on_result, self.control, metrics)
+                elif merging:
+                    merged = render_merged(jobs, template_file, paths, on_result, self.control, metrics)
+                    written = sum(count for _, count in merged)
+                    for merged_path, count in merged:
+                        self.post_status(f"Merged {count} cover sheet(s): {merged_path}", "success")
+                else:
+                    written = render_jobs(jobs, renderer_name, template_file, workers, on_result, self.control,
+                                          metrics=metrics, archive=archive)
+            finally:
+                paths.save()
+                if archive:
+                    archive.close()
+            if archive:
+                for archive_path in archive.paths:
+                    self.post_status(f"Archive written: {archive_path}", "success")
+            reused = metrics.to_dict()["counters"].get("documents_reused", 0)
+            if reused:
+                self.post_status(f"{reused} duplicate document(s) reused instead of rendered again", "info")
+            self.events.put(("done", written, self.control.cancelled))
+            
+        except Exception as e:
+            self.events.put(("error", str(e)))
+    
+    def post_status(self, message, msg_type="info"):
+        """Queue a status message for the UI thread"""
+        self.events.put(("log", message, msg_type))
+    
+    def post_progress(self, value, label_text=None):
+        """Queue a progress update for the UI thread"""
+        self.events.put(("progress", value, label_text))
+    
+    def poll_events(self):
+        """Drain events from the generation thread and apply them to the UI"""
+        finished = None
+        try:
+            while True:
+                event = self.events.get_nowait()
+                if event[0] == "log":
+                    self.log_status(event[1], event[2])
+                elif event[0] == "progress":
+                    self.pending_progress = event[1:]
+                else:
+                    finished = event
+        except queue.Empty:
+            pass
+        
+        # Redraw progress at most PROGRESS_UPDATES_PER_SECOND times a second
+        now = time.monotonic()
+        if self.pending_progress and (finished or now - self.last_progress_draw >= 1 / PROGRESS_UPDATES_PER_SECOND):
+            self.update_progress(*self.pending_progress)
+            self.pending_progress = None
+            self.last_progress_draw = now
+        
+        if finished is None:
+            self.root.after(EVENT_POLL_MS, self.poll_events)
+            return
+        
+        self.set_run_controls(False)
+        self.generate_btn.config(state=tk.NORMAL)
+        if self.metrics:
+            self.log_status("Run timings:", "info")
+            for line in self.metrics.summary():
+                self.log_status(f"  {line}", "info")
+            self.report_btn.config(state=tk.NORMAL)
+        if finished[0] == "error":
+            messagebox.showerror("Error", f"Error during generation: {finished[1]}")
+            self.log_status(f"Error: {finished[1]}", "error")
+            self.update_progress(0, "Error occurred")
+        elif finished[2]:
+            self.log_status(f"Generation cancelled after {finished[1]} documents.", "warning")
+            self.update_progress(self.progress_var.get(), "Cancelled")
+        else:
+            self.log_status(f"Successfully generated {finished[1]} documents!", "success")
             self.update_progress(100, "Complete!")
             
             # Ask if user wants to process another sheet
             self.ask_another_sheet()
-            
+    
+    def set_run_controls(self, running):
+        """Enable the pause and cancel buttons while a batch is running"""
+        state = tk.NORMAL if running else tk.DISABLED
+        self.pause_btn.config(state=state, text="Pause")
+        self.cancel_btn.config(state=state)
+    
+    def toggle_pause(self):
+        """Pause or resume the running batch"""
+        if self.control is None:
+            return
+        if self.control.paused:
+            self.control.resume()
+            self.pause_btn.config(text="Pause")
+            self.log_status("Generation resumed.", "info")
+        else:
+            self.control.pause()
+            self.pause_btn.config(text="Resume")
+            self.log_status("Generation paused.", "warning")
+    
+    def cancel_generation(self):
+        """Stop the running batch after the documents in progress"""
+        if self.control is None:
+            return
+        self.control.cancel()
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.pause_btn.config(state=tk.DISABLED)
+        self.log_status("Cancelling generation...", "warning")
+    
+    def export_report(self):
+        """Save the timings and counters of the last run as JSON or CSV"""
+        if self.metrics is None:
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Run Report",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")]
+        )
+        if not path:
+            return
+        try:
+            self.metrics.export(path)
+            self.log_status(f"Run report saved: {path}", "success")
         except Exception as e:
-            messagebox.showerror("Error", f"Error during generation: {str(e)}")
-            self.log_status(f"Error: {str(e)}", "error")
-            self.update_progress(0, "Error occurred")
-        finally:
-            self.generate_btn.config(state=tk.NORMAL)
+            messagebox.showerror("Error", f"Could not save the report: {str(e)}")
+            self.log_status(f"Could not save the report: {str(e)}", "error")
+    
+    def export_row_errors(self):
+        """Save the rows of the current sheet that failed validation as CSV or Excel"""
+        if not self.row_errors:
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Row Errors",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Excel", "*.xlsx")]
+        )
+        if not path:
+            return
+        try:
+            from docgen_sheet import export_row_errors
+            export_row_errors(path, self.row_errors)
+            self.log_status(f"Row errors saved: {path}", "success")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not save the row errors: {str(e)}")
+            self.log_status(f"Could not save the row errors: {str(e)}", "error")
     
     def ask_another_sheet(self):
         """Ask user if they want to process another sheet"""
@@ -811,8 +1200,11 @@ class DocumentGeneratorApp:
             # Reset for another sheet
             self.df = None
             self.file_path = None
+            self.row_errors = []
+            self.row_errors_btn.config(state=tk.DISABLED)
             self.file_label.config(text="No file selected", fg="#a0a0a0")
             self.progress_var.set(0)
+            self.status_buffer.clear()
             self.status_text.config(state=tk.NORMAL)
             self.status_text.delete(1.0, tk.END)
             self.status_text.config(state=tk.DISABLED)
@@ -821,89 +1213,13 @@ class DocumentGeneratorApp:
             self.log_status("Ready for a new master sheet. Please select a file to begin.", "info")
         else:
             self.root.quit()
-    
-    def replace_table_cell_content_in_header(self, doc, replacements):
-        """Replace table content in the header of the Word document"""
-        section = doc.Sections(1)
-        primary_header = section.Headers(1)
-        first_page_header = section.Headers(2)
-        even_page_header = section.Headers(3)
-        
-        for header in [primary_header, first_page_header, even_page_header]:
-            if header.Range.Tables.Count > 0:
-                table = header.Range.Tables(1)
-                for row in table.Rows:
-                    for cell in row.Cells:
-                        text = cell.Range.Text.strip()
-                        for placeholder, value in replacements.items():
-                            if placeholder in text:
-                                cell.Range.Text = text.replace(placeholder, value)
-                break
-    
-    def output_file_generator(self, month, year, centre, room, file, day=None):
-        """Generate output file path"""
-        month_full_map = {
-            "Jan": "January", "Feb": "February", "Mar": "March", "Apr": "April",
-            "May": "May", "Jun": "June", "Jul": "July", "Aug": "August",
-            "Sep": "September", "Oct": "October", "Nov": "November", "Dec": "December"
-        }
-        month_full = month_full_map.get(month, month)
-        
-        if day is None:
-            day = 1
-        
-        path = os.path.join(file, f"{month_full} {day}", "Word Documents Completed")
-        os.makedirs(path, exist_ok=True)
-        return path
-    
-    def initialize_df(self, df):
-        """Initialize dataframe by cleaning and extracting necessary columns"""
-        df.drop(df.columns[[0, 1, 3, 6, 7, 5, 8, 10, 11]], axis=1, inplace=True)
-        df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
-        df.dropna(inplace=True)
-        df["Word"] = df.iloc[:, -2]
-        df["ID"] = df.iloc[:, -2]
-        df.drop(df.columns[3], axis=1, inplace=True)
-        df.drop(df.columns[3], axis=1, inplace=True)
-        df["Course_Name"] = df["Course"].str.split(" ", expand=True)[0]
-        df["Course_Code"] = df["Course"].str.split(" ", expand=True)[1]
-        df["Course_Section"] = df["Course"].str.split(" ", expand=True)[3]
-        
-        first_names = []
-        last_names = []
-        df["Room Booking"] = df["Room Booking"].str.replace(r'\s+', ' ', regex=True)
-        
-        for name in df['Student']:
-            name_parts = name.split()
-            first_name = name_parts[0]
-            last_name = name_parts[-1]
-            first_names.append(first_name)
-            last_names.append(last_name)
-        
-        df['First_Name'] = first_names
-        df['Last_Name'] = last_names
-        df.drop(columns=["Word"], inplace=True)
-        df['ID'] = df['ID'].astype(int)
-        
-        buildings = []
-        rooms = []
-        
-        for booking in df["Room Booking"]:
-            parts = booking.split()
-            building = ''.join(filter(str.isdigit, parts[-2])) if len(parts) > 1 else ""
-            room = parts[-1] if len(parts) > 0 else ""
-            buildings.append(building)
-            rooms.append(room)
-        
-        df['Centre'] = buildings
-        df['Room'] = rooms
-        df.drop(df.columns[2], axis=1, inplace=True)
-        df.drop(df.columns[0], axis=1, inplace=True)
-        
-        return df
 
 
 def main():
+    # Worker processes of the frozen executable start here
+    multiprocessing.freeze_support()
+    imports_done = time.perf_counter()
+    
     # Use TkinterDnD if available, otherwise regular Tk
     if DND_AVAILABLE:
         root = TkinterDnD.Tk()
@@ -911,6 +1227,8 @@ def main():
         root = tk.Tk()
     
     app = DocumentGeneratorApp(root)
+    ui_built = time.perf_counter()
+    root.after_idle(lambda: app.report_startup(imports_done, ui_built))
     root.mainloop()
 
 
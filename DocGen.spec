@@ -6,11 +6,15 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('template.docx', '.')],
-    hiddenimports=[],
+    # pyarrow is only found through importlib.util.find_spec and imported
+    # by pandas on demand, so name it or the frozen build never caches sheets
+    hiddenimports=['pyarrow'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Optional pandas dependencies DocGen never uses; leaving them out keeps
+    # the onefile archive small so it unpacks quickly at launch
+    excludes=['scipy', 'matplotlib', 'mpl_toolkits', 'contourpy', 'setuptools'],
     noarchive=False,
     optimize=0,
 )
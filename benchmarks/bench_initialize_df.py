@@ -0,0 +1,79 @@
+"""Compare the vectorized initialize_df with the original row-loop version
+
+    python benchmarks/bench_initialize_df.py [rows ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docgen_sheet import initialize_df
+from synthetic import make_master_sheet
+
+
+def legacy_initialize_df(df):
+    """initialize_df as it was before vectorization, kept for comparison"""
+    df.drop(df.columns[[0, 1, 3, 6, 7, 5, 8, 10, 11]], axis=1, inplace=True)
+    df = df.apply(lambda x: x.str.strip() if x.dtype == "object" else x)
+    df.dropna(inplace=True)
+    df["Word"] = df.iloc[:, -2]
+    df["ID"] = df.iloc[:, -2]
+    df.drop(df.columns[3], axis=1, inplace=True)
+    df.drop(df.columns[3], axis=1, inplace=True)
+    df["Course_Name"] = df["Course"].str.split(" ", expand=True)[0]
+    df["Course_Code"] = df["Course"].str.split(" ", expand=True)[1]
+    df["Course_Section"] = df["Course"].str.split(" ", expand=True)[3]
+
+    first_names = []
+    last_names = []
+    df["Room Booking"] = df["Room Booking"].str.replace(r'\s+', ' ', regex=True)
+
+    for name in df['Student']:
+        name_parts = name.split()
+        first_names.append(name_parts[0])
+        last_names.append(name_parts[-1])
+
+    df['First_Name'] = first_names
+    df['Last_Name'] = last_names
+    df.drop(columns=["Word"], inplace=True)
+    df['ID'] = df['ID'].astype(int)
+
+    buildings = []
+    rooms = []
+
+    for booking in df["Room Booking"]:
+        parts = booking.split()
+        buildings.append(''.join(filter(str.isdigit, parts[-2])) if len(parts) > 1 else "")
+        rooms.append(parts[-1] if len(parts) > 0 else "")
+
+    df['Centre'] = buildings
+    df['Room'] = rooms
+    df.drop(df.columns[2], axis=1, inplace=True)
+    df.drop(df.columns[0], axis=1, inplace=True)
+
+    return df
+
+
+def best_of(func, raw, repeat=3):
+    """Best wall time of func over fresh copies of raw"""
+    times = []
+    for _ in range(repeat):
+        df = raw.copy()
+        started = time.perf_counter()
+        func(df)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+    for rows in sizes:
+        raw = make_master_sheet(rows)
+        legacy = best_of(legacy_initialize_df, raw)
+        vectorized = best_of(initialize_df, raw)
+        print(f"{rows:>8} {legacy:>11.3f} {vectorized:>15.3f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,127 @@
+"""Throughput of the generation pipeline, stage by stage, for each backend
+
+    python benchmarks/bench_pipeline.py [rows ...] [--engines native word] [--workers N]
+        [--format csv|xlsx] [--render-limit N] [--json results.json]
+
+Every (rows, engine) case runs in a fresh process on a synthetic master
+sheet, so peak RSS belongs to that case alone. Documents go through
+render_jobs exactly as in a real run, and the stage histograms and
+counters of its RunMetrics are reported per case.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docgen_metrics import RunMetrics
+from docgen_pipeline import OutputPathIndex, build_jobs, render_jobs
+from docgen_render import available_renderers, default_template_path
+from docgen_sheet import apply_date, initialize_df, read_master_sheet
+from synthetic import write_master_sheet
+
+SIZES = [100, 1000, 10000, 100000]
+EXAM_DATE = datetime(2026, 4, 21)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, if the platform reports it"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(rows, engine, workers, sheet_format, template_file, render_limit):
+    """Run the pipeline for one sheet size and engine; runs in its own process"""
+    work_dir = tempfile.mkdtemp(prefix="docgen-bench-")
+    try:
+        sheet = write_master_sheet(os.path.join(work_dir, f"master.{sheet_format}"), rows)
+        output_directory = os.path.join(work_dir, "out")
+        metrics = RunMetrics()
+
+        with metrics.time("load"):
+            raw = read_master_sheet(sheet)
+        with metrics.time("preprocess"):
+            df = apply_date(initialize_df(raw), EXAM_DATE)
+        with metrics.time("plan"):
+            jobs, _ = build_jobs(df, output_directory, OutputPathIndex(output_directory, metrics=metrics))
+        if render_limit:
+            jobs = jobs[:render_limit]
+
+        started = time.perf_counter()
+        written = render_jobs(jobs, engine, template_file, workers, metrics=metrics)
+        seconds = time.perf_counter() - started
+        peak = peak_rss_mb()
+        return {
+            "rows": rows,
+            "engine": engine,
+            "workers": workers,
+            "format": sheet_format,
+            "documents": written,
+            "render_seconds": round(seconds, 4),
+            "docs_per_second": round(written / seconds, 1) if seconds > 0 else None,
+            "peak_rss_mb": round(peak, 1) if peak is not None else None,
+            "metrics": metrics.to_dict(),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def print_table(results):
+    print(f"{'rows':>7} {'engine':>7} {'workers':>7} {'documents':>9} {'render (s)':>10} {'docs/s':>9} {'peak MB':>8}")
+    for result in results:
+        print(f"{result['rows']:>7} {result['engine']:>7} {result['workers']:>7} {result['documents']:>9}"
+              f" {result['render_seconds']:>10.3f} {result['docs_per_second'] or 0:>9.1f}"
+              f" {result['peak_rss_mb'] or 0:>8.1f}")
+        stages = result["metrics"]["stages"]
+        for stage, data in sorted(stages.items(), key=lambda item: -item[1]["total_seconds"]):
+            print(f"{'':>9}{stage:<14} {data['count']:>7} x {data['total_seconds']:>9.3f}s"
+                  f"  p50 {data['p50_ms']:>9.3f} ms  p99 {data['p99_ms']:>9.3f} ms  max {data['max_ms']:>9.3f} ms")
+        counters = result["metrics"]["counters"]
+        if counters:
+            print(f"{'':>9}" + ", ".join(f"{name}: {value}" for name, value in sorted(counters.items())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the generation pipeline")
+    parser.add_argument("rows", type=int, nargs="*", default=SIZES, help="Sheet sizes (default: %(default)s)")
+    parser.add_argument("--engines", nargs="+", default=available_renderers(), choices=available_renderers())
+    parser.add_argument("--workers", type=int, default=1, help="Render processes (default: %(default)s)")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv", help="Synthetic sheet format")
+    parser.add_argument("--template", default=default_template_path())
+    parser.add_argument("--render-limit", type=int, help="Render at most this many documents per case")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for rows in args.rows:
+        for engine in args.engines:
+            # A fresh process per case keeps peak RSS from carrying over
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results.append(executor.submit(
+                    run_case, rows, engine, args.workers, args.format, args.template, args.render_limit
+                ).result())
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Synthetic master sheets in the column layout initialize_df expects"""
+import random
+import pandas as pd
+
+# Raw registrar export columns; initialize_df keeps Course, Student, Room
+# Booking and the trailing student ID column, and drops the rest by position
+COLUMNS = [
+    "Date", "Time", "Course", "Instructor", "Student", "Email", "Duration",
+    "Accommodations", "Notes", "Room Booking", "Status", "Booked By", "Exam Type", "Student ID",
+]
+
+FIRST_NAMES = ["Olivia", "Liam", "Emma", "Noah", "Ava", "Lucas", "Mia", "Ethan", "Zoe", "Arjun", "Mei", "Omar"]
+LAST_NAMES = ["Smith", "Nguyen", "Patel", "Garcia", "Brown", "Kim", "Singh", "Martin", "Lee", "Wilson"]
+SUBJECTS = ["MATH", "PHYS", "CHEM", "BIOL", "ECON", "COMP", "HIST", "PSYC"]
+
+
+def make_master_sheet(rows, seed=0):
+    """Return a raw master sheet DataFrame, as read_master_sheet would"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        middle = f" {rng.choice(FIRST_NAMES)}" if rng.random() < 0.3 else ""
+        records.append([
+            "2026-04-21",
+            "9:00 AM",
+            f"{rng.choice(SUBJECTS)} {rng.randint(100, 499)} LEC {rng.randint(1, 12):03d}",
+            "Dr. Staff",
+            f" {first}{middle} {last} ",
+            f"{first.lower()}.{last.lower()}@example.edu",
+            "3h",
+            "Extra time",
+            "n/a",
+            f"Testing  Centre  TC{rng.randint(1, 6)}   {rng.randint(100, 450)}",
+            "Booked",
+            "Accessibility",
+            "Final",
+            str(300000000 + i),
+        ])
+    return pd.DataFrame(records, columns=COLUMNS)
+
+
+def write_master_sheet(path, rows, seed=0):
+    """Write a synthetic sheet with the title row above the header, like the export"""
+    df = make_master_sheet(rows, seed)
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write("Exam Bookings" + "," * (len(COLUMNS) - 1) + "\n")
+            df.to_csv(f, index=False)
+    else:
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame([["Exam Bookings"]]).to_excel(writer, index=False, header=False)
+            df.to_excel(writer, index=False, startrow=1)
+    return path
@@ -0,0 +1,127 @@
+import hashlib
+import importlib.util
+import os
+from contextlib import nullcontext
+from docgen_manifest import file_digest
+from docgen_paths import user_data_dir
+
+# Parquet files are written and read through pyarrow; without it nothing is cached
+CACHE_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Total size of cached sheets; the least recently used are evicted beyond it
+CACHE_MAX_BYTES = 256 * 2 ** 20
+
+CACHE_SUFFIX = ".parquet"
+
+
+def cache_root():
+    """Per-user folder for cached master sheets"""
+    return user_data_dir("sheet-cache")
+
+
+class SheetCache:
+    """Prepared master sheets stored as Parquet, keyed by the sheet's stat, content hash and PREPARE_VERSION"""
+    def __init__(self, directory=None, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory or cache_root()
+        self.max_bytes = max_bytes
+        self.enabled = CACHE_AVAILABLE
+        # Keys already computed, so a miss followed by a store hashes the file once
+        self.keys = {}
+
+    def key(self, file_path):
+        from docgen_sheet import PREPARE_VERSION
+
+        path = os.path.normcase(os.path.abspath(file_path))
+        stat = os.stat(file_path)
+        identity = (path, stat.st_size, stat.st_mtime_ns)
+        if identity not in self.keys:
+            fingerprint = "\0".join([
+                str(PREPARE_VERSION), path, str(stat.st_size), str(stat.st_mtime_ns), file_digest(file_path)
+            ])
+            self.keys[identity] = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+        return self.keys[identity]
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def load(self, file_path):
+        """The prepared dataframe cached for file_path, or None on a miss"""
+        if not self.enabled:
+            return None
+        import pandas as pd
+
+        path = self.entry_path(self.key(file_path))
+        try:
+            df = pd.read_parquet(path)
+        except (OSError, ValueError):
+            # Missing or unreadable (e.g. half-written by a killed process)
+            return None
+        # Eviction goes by modification time, so a hit counts as a use
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def store(self, file_path, df):
+        """Cache the prepared dataframe of file_path; returns whether it was written"""
+        if not self.enabled:
+            return False
+        path = self.entry_path(self.key(file_path))
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            df.to_parquet(temp_path, index=True)
+            os.replace(temp_path, path)
+        except (OSError, ValueError, TypeError):
+            # Columns pyarrow cannot store (e.g. mixed types) just go uncached
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits max_bytes"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith(CACHE_SUFFIX):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def load_master_sheet_cached(file_path, cache=None, metrics=None):
+    """Return (df, hit): the prepared master sheet from the cache, or read, prepared and cached"""
+    from docgen_sheet import initialize_df, read_master_sheet
+
+    def timed(stage):
+        return metrics.time(stage) if metrics else nullcontext()
+
+    if cache is not None:
+        with timed("sheet_cache"):
+            df = cache.load(file_path)
+        if df is not None:
+            return df, True
+    with timed("load"):
+        raw = read_master_sheet(file_path)
+    with timed("initialize_df"):
+        df = initialize_df(raw)
+    if cache is not None:
+        with timed("sheet_cache_store"):
+            cache.store(file_path, df)
+    return df, False
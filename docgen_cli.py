@@ -0,0 +1,215 @@
+"""Headless batch mode for DocGen
+
+Generates the cover sheets for one master sheet without the Tk GUI and
+prints a JSON summary on stdout, e.g.
+
+    python docgen_cli.py master.xlsx --date 2026-04-21 --output "D:/Exams"
+
+Several exam dates can be generated in one run, each into its own
+"Month Day" folder, e.g. --date 2026-04-21..2026-04-24,2026-04-28.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+from docgen_cache import SheetCache, load_master_sheet_cached
+from docgen_manifest import file_digest
+from docgen_metrics import RunMetrics
+from docgen_render import (
+    WORD_DOCUMENT_TIMEOUT, WORD_RECYCLE_AFTER, WORD_RETRIES, WordRenderer, available_renderers, default_template_path
+)
+from docgen_sheet import (
+    STREAM_CHUNK_ROWS, SUPPORTED_EXTENSIONS, export_row_errors, iter_master_sheet, parse_dates
+)
+from docgen_pipeline import (
+    DEFAULT_WORKERS, ArchiveWriter, OutputPathIndex, build_jobs_for_dates, dates_label, render_jobs, render_merged,
+    render_pdf
+)
+
+EXIT_OK = 0
+EXIT_FAILED_DOCUMENTS = 1
+EXIT_ERROR = 2
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate exam cover sheets from a master sheet without the GUI")
+    parser.add_argument("master_sheet", help="Master sheet (.xlsx, .xls or .csv)")
+    parser.add_argument("--date", default=datetime.now().strftime("%Y-%m-%d"),
+                        help="Exam date as YYYY-MM-DD, or several as a comma-separated list of dates and "
+                             "START..END ranges, all generated in one run (default: today)")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--template", default=default_template_path(), help="Template .docx")
+    parser.add_argument("--engine", choices=available_renderers(), default=available_renderers()[0],
+                        help="Rendering engine (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Worker processes (default: %(default)s)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the sheet in chunks and render while it is still being parsed")
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS,
+                        help="Rows per chunk with --stream (default: %(default)s)")
+    parser.add_argument("--word-recycle-after", type=int, default=WORD_RECYCLE_AFTER,
+                        help="Restart each Word process after this many documents (default: %(default)s)")
+    parser.add_argument("--word-timeout", type=float, default=WORD_DOCUMENT_TIMEOUT,
+                        help="Seconds before a hung Word process is killed (default: %(default)s)")
+    parser.add_argument("--word-retries", type=int, default=WORD_RETRIES,
+                        help="Retries of a document after Word crashed or hung (default: %(default)s)")
+    output_mode = parser.add_mutually_exclusive_group()
+    output_mode.add_argument("--zip", choices=ArchiveWriter.GROUPS,
+                             help="Write the documents into one zip, or one per centre or room, instead of "
+                                  "separate files")
+    output_mode.add_argument("--merge", action="store_true",
+                             help="Write one combined document per centre and room, one section per cover sheet "
+                                  "(always uses the native engine)")
+    output_mode.add_argument("--pdf", action="store_true",
+                             help="Write PDFs instead of .docx files, converted by LibreOffice "
+                                  "(always uses the native engine; --workers sets parallel conversions)")
+    parser.add_argument("--no-sheet-cache", action="store_true",
+                        help="Always parse the master sheet, ignoring and not updating the sheet cache")
+    parser.add_argument("--force", action="store_true",
+                        help="Render every row, even documents that are already up to date")
+    parser.add_argument("--row-errors",
+                        help="Write the rows that failed validation, and why, to this .csv or .xlsx file")
+    parser.add_argument("--metrics", help="Write per-stage timings and counters to this .json or .csv file")
+    parser.add_argument("--verbose", action="store_true", help="Print one line per document on stderr")
+    return parser.parse_args(argv)
+
+
+def run(args):
+    """Generate the batch described by args and return the summary dict"""
+    started = time.perf_counter()
+    dates = parse_dates(args.date)
+
+    if not args.master_sheet.endswith(SUPPORTED_EXTENSIONS):
+        raise ValueError("Unsupported file format. Please select an Excel or CSV file.")
+    if not os.path.exists(args.template):
+        raise FileNotFoundError(f"Template file not found at {args.template}")
+    os.makedirs(args.output, exist_ok=True)
+
+    metrics = RunMetrics()
+    if args.merge:
+        paths = OutputPathIndex(args.output, metrics=metrics)
+        archive = None
+    elif args.zip:
+        # Paths only name archive entries, so no folders are created
+        paths = OutputPathIndex(args.output, metrics=metrics, create_folders=False)
+        archive = ArchiveWriter(args.output, args.zip, f"Cover Sheets {dates_label(dates)}")
+    else:
+        # Folder manifests let a re-run skip documents that are already up to date
+        paths = OutputPathIndex(args.output, file_digest(args.template), args.force, metrics,
+                                extension=".pdf" if args.pdf else ".docx")
+        archive = None
+    records = 0
+    skipped = []
+    cache_hit = None
+    if args.stream:
+        def stream_jobs():
+            nonlocal records
+            chunks = iter_master_sheet(args.master_sheet, args.chunk_rows)
+            while True:
+                # Reading a chunk includes preparing its columns
+                with metrics.time("load"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                records += len(chunk)
+                with metrics.time("plan"):
+                    chunk_jobs, chunk_skipped = build_jobs_for_dates(chunk, dates, args.output, paths)
+                skipped.extend(chunk_skipped)
+                yield from chunk_jobs
+
+        jobs = stream_jobs()
+        loaded = started
+    else:
+        # An unchanged sheet is restored from the cache instead of parsed again
+        cache = None if args.no_sheet_cache else SheetCache()
+        df, cache_hit = load_master_sheet_cached(args.master_sheet, cache, metrics)
+        records = len(df)
+        loaded = time.perf_counter()
+        # Every date is planned up front and rendered in one pass by one renderer
+        with metrics.time("plan"):
+            jobs, skipped = build_jobs_for_dates(df, dates, args.output, paths)
+    errors = []
+
+    def on_result(job, error):
+        if error is None:
+            paths.complete(job.output_path)
+        else:
+            errors.append({"row": job.index + 1, "file": os.path.basename(job.output_path), "error": error})
+        if args.verbose and not (args.merge and error is None):
+            print(f"{'FAILED' if error else 'Saved'}: {job.output_path}", file=sys.stderr)
+
+    options = None
+    if args.engine == WordRenderer.name:
+        options = {"recycle_after": args.word_recycle_after, "timeout": args.word_timeout, "retries": args.word_retries}
+    merged = []
+    try:
+        if args.pdf:
+            written = render_pdf(jobs, args.template, args.workers, on_result, metrics=metrics)
+        elif args.merge:
+            merged = render_merged(jobs, args.template, paths, on_result, metrics=metrics)
+            written = sum(count for _, count in merged)
+            if args.verbose:
+                for path, count in merged:
+                    print(f"Merged {count}: {path}", file=sys.stderr)
+        else:
+            written = render_jobs(jobs, args.engine, args.template, args.workers, on_result, options=options,
+                                  metrics=metrics, archive=archive)
+    finally:
+        paths.save()
+        if archive:
+            archive.close()
+    metrics.count("rows_skipped", len(skipped))
+    metrics.count("up_to_date", paths.up_to_date)
+    if args.row_errors:
+        export_row_errors(args.row_errors, skipped)
+    if args.metrics:
+        metrics.export(args.metrics)
+    finished = time.perf_counter()
+
+    generate_seconds = finished - loaded
+    return {
+        "status": "ok" if not errors else "failed_documents",
+        "master_sheet": os.path.abspath(args.master_sheet),
+        "output_directory": os.path.abspath(args.output),
+        "date": dates[0].strftime("%Y-%m-%d"),
+        "dates": [exam_date.strftime("%Y-%m-%d") for exam_date in dates],
+        "engine": "native" if args.merge or args.pdf else args.engine,
+        "workers": args.workers,
+        "streamed": args.stream,
+        "sheet_cache": None if args.stream or args.no_sheet_cache else ("hit" if cache_hit else "miss"),
+        "records": records,
+        "documents": written,
+        "reused": metrics.to_dict()["counters"].get("documents_reused", 0),
+        "up_to_date": paths.up_to_date,
+        "archives": archive.paths if archive else [],
+        "merged_documents": [path for path, _ in merged],
+        "skipped_rows": [{"row": row, "student": student, "error": error} for row, student, error in skipped],
+        "failed": errors,
+        # With --stream, loading overlaps generation and is counted there
+        "load_seconds": None if args.stream else round(loaded - started, 3),
+        "generate_seconds": round(generate_seconds, 3),
+        "docs_per_second": round(written / generate_seconds, 1) if generate_seconds > 0 else None,
+        "stages": {
+            stage: {key: data[key] for key in ("count", "total_seconds", "p50_ms", "p99_ms")}
+            for stage, data in metrics.to_dict()["stages"].items()
+        },
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        summary = run(args)
+    except Exception as e:
+        print(json.dumps({"status": "error", "error": str(e)}))
+        return EXIT_ERROR
+    print(json.dumps(summary, indent=2))
+    return EXIT_OK if summary["status"] == "ok" else EXIT_FAILED_DOCUMENTS
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
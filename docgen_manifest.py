@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+
+# Kept in each "Word Documents Completed" folder next to the documents
+MANIFEST_NAME = ".docgen-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, e.g. the template"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_digest(template_digest, replacements):
+    """Hash of everything a document is rendered from: template and values"""
+    digest = hashlib.sha256(template_digest.encode("ascii"))
+    for placeholder in sorted(replacements):
+        digest.update(f"\0{placeholder}\0{replacements[placeholder]}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class FolderManifest:
+    """Which file each row of earlier runs was written to, and the digest it was rendered from"""
+    def __init__(self, folder):
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data["documents"]
+        except (OSError, ValueError, KeyError):
+            # Missing or unreadable manifest: every row counts as new
+            pass
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def record(self, key, file_name, digest):
+        # key is the output name plus "#N" for its Nth repeat; a digest of None means not confirmed written
+        self.entries[key] = {"file": file_name, "hash": digest}
+        self.dirty = True
+
+    def save(self):
+        """Write the manifest atomically if anything changed"""
+        if not self.dirty:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "documents": self.entries}, f, separators=(",", ":"))
+        os.replace(temp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,149 @@
+import bisect
+import csv
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in milliseconds; wide enough for a native
+# render (well under 1 ms) and a Word document on a slow share alike
+BUCKET_BOUNDS_MS = [
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+    1000, 2500, 5000, 10000, 30000, 60000, float("inf"),
+]
+
+
+class StageHistogram:
+    """Count, total, extremes and bucketed distribution of one stage's durations"""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * len(BUCKET_BOUNDS_MS)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, seconds * 1000)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile_ms(self, p):
+        """Upper bound of the bucket holding the p-th percentile, capped at the maximum"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max * 1000)
+        return self.max * 1000
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 6),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "min_ms": round(self.min * 1000, 3) if self.min is not None else None,
+            "p50_ms": round(self.percentile_ms(50), 3) if self.count else None,
+            "p99_ms": round(self.percentile_ms(99), 3) if self.count else None,
+            "max_ms": round(self.max * 1000, 3) if self.max is not None else None,
+            "buckets_ms": {
+                ("inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets) if count
+            },
+        }
+
+
+class RunMetrics:
+    """Counters and per-stage timing histograms for one run, safe to update from the generation thread"""
+    def __init__(self):
+        self.counters = {}
+        self.stages = {}
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = StageHistogram()
+            self.stages[stage].observe(seconds)
+
+    def observe_all(self, timings):
+        """Record a {stage: seconds} dict, e.g. the timings of one document"""
+        for stage, seconds in timings.items():
+            self.observe(stage, seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """Time the enclosed block as one observation of stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def merge(self, other):
+        """Add the counters and stages of another RunMetrics, e.g. from loading"""
+        with self.lock:
+            for name, amount in other.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+            for stage, histogram in other.stages.items():
+                if stage not in self.stages:
+                    self.stages[stage] = StageHistogram()
+                self.stages[stage].merge(histogram)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "counters": dict(self.counters),
+                "stages": {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+            }
+
+    def summary(self):
+        """Human-readable lines, slowest stage first"""
+        report = self.to_dict()
+        lines = []
+        for stage, data in sorted(report["stages"].items(), key=lambda item: -item[1]["total_seconds"]):
+            if data["count"] == 1:
+                lines.append(f"{stage}: {data['total_seconds']:.3f}s")
+            else:
+                lines.append(
+                    f"{stage}: {data['count']} x, {data['total_seconds']:.3f}s total, "
+                    f"p50 {data['p50_ms']:.2f} ms, p99 {data['p99_ms']:.2f} ms, max {data['max_ms']:.2f} ms"
+                )
+        if report["counters"]:
+            lines.append(", ".join(f"{name}: {value}" for name, value in sorted(report["counters"].items())))
+        return lines
+
+    def export(self, path):
+        """Write the report as JSON, or as CSV when path ends in .csv"""
+        report = self.to_dict()
+        if path.lower().endswith(".csv"):
+            fields = ["kind", "name", "count", "total_seconds", "mean_ms", "min_ms", "p50_ms", "p99_ms", "max_ms"]
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+                writer.writeheader()
+                for stage, data in report["stages"].items():
+                    writer.writerow({"kind": "stage", "name": stage, **data})
+                for name, value in report["counters"].items():
+                    writer.writerow({"kind": "counter", "name": name, "count": value})
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
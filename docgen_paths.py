@@ -0,0 +1,7 @@
+import os
+
+
+def user_data_dir(*parts):
+    """Per-user DocGen folder: under LOCALAPPDATA on Windows, ~/.local/share elsewhere"""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "DocGen", *parts)
@@ -0,0 +1,79 @@
+import os
+import pathlib
+import queue
+import shutil
+import subprocess
+import sys
+from docgen_paths import user_data_dir
+
+# Documents converted per LibreOffice call; each call pays start-up once
+PDF_BATCH_SIZE = 100
+
+# Seconds one batch may take before the conversion is abandoned
+PDF_BATCH_TIMEOUT = 600
+
+# Where LibreOffice is usually installed on Windows, which does not put it on PATH
+WINDOWS_SOFFICE_PATHS = [
+    r"C:\Program Files\LibreOffice\program\soffice.exe",
+    r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+]
+
+
+def find_soffice():
+    """Path of the LibreOffice executable, or None if it is not installed"""
+    found = shutil.which("soffice") or shutil.which("libreoffice")
+    if found:
+        return found
+    if sys.platform == "win32":
+        for path in WINDOWS_SOFFICE_PATHS:
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def profile_root():
+    """Per-user folder for the LibreOffice profiles used for conversion"""
+    return user_data_dir("pdf-profiles")
+
+
+class PdfConverter:
+    """Convert batches of .docx files to PDF with headless LibreOffice, up to slots batches at once"""
+    def __init__(self, slots=1, soffice=None, profiles=None):
+        self.soffice = soffice or find_soffice()
+        if self.soffice is None:
+            raise RuntimeError("PDF output requires LibreOffice (https://www.libreoffice.org)")
+        profiles = profiles or profile_root()
+        # Concurrent LibreOffice instances cannot share a profile; each slot's is kept so fonts are scanned once
+        self.profiles = queue.Queue()
+        for slot in range(max(1, slots)):
+            path = os.path.join(profiles, f"slot{slot}")
+            os.makedirs(path, exist_ok=True)
+            self.profiles.put(path)
+
+    def convert(self, docx_paths, output_directory):
+        """Convert docx_paths into output_directory; returns the PDF path per input, None where it failed"""
+        profile = self.profiles.get()
+        try:
+            subprocess.run(
+                [
+                    self.soffice,
+                    f"-env:UserInstallation={pathlib.Path(profile).as_uri()}",
+                    "--headless", "--norestore", "--nologo", "--nodefault", "--nolockcheck",
+                    "--convert-to", "pdf", "--outdir", output_directory,
+                    *docx_paths,
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=PDF_BATCH_TIMEOUT,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        finally:
+            self.profiles.put(profile)
+
+        results = []
+        for docx_path in docx_paths:
+            stem = os.path.splitext(os.path.basename(docx_path))[0]
+            pdf_path = os.path.join(output_directory, stem + ".pdf")
+            results.append(pdf_path if os.path.exists(pdf_path) else None)
+        return results
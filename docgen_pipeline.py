@@ -0,0 +1,859 @@
+import itertools
+import os
+from collections import OrderedDict, deque
+import multiprocessing
+import multiprocessing.util
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from docgen_manifest import FolderManifest, row_digest
+from docgen_pdf import PDF_BATCH_SIZE, PdfConverter
+from docgen_render import RENDERERS, MergedTemplate, NativeRenderer, create_renderer
+
+# Chunks handed to each worker per round, to keep the pool evenly loaded
+CHUNKS_PER_WORKER = 4
+
+# Chunks queued per worker at any time, so pause and cancel take effect quickly
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# How often finished documents are flushed to the folder manifests mid-run
+MANIFEST_SAVE_SECONDS = 5
+
+# Threads writing rendered documents to disk, and how many rendered documents
+# may wait for them before rendering blocks; a slow share then holds up
+# rendering only once the queue is full, with memory bounded by its size
+WRITER_THREADS = 4
+WRITER_QUEUE_DOCUMENTS = 64
+
+# Archives kept open at once when zipping per centre or room; the least
+# recently used is closed and reopened for appending when needed again
+MAX_OPEN_ARCHIVES = 16
+
+MONTH_FULL_MAP = {
+    "Jan": "January", "Feb": "February", "Mar": "March", "Apr": "April",
+    "May": "May", "Jun": "June", "Jul": "July", "Aug": "August",
+    "Sep": "September", "Oct": "October", "Nov": "November", "Dec": "December"
+}
+
+
+class GenerationControl:
+    """Pause and cancel switches shared between the UI and a running batch"""
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self._running.set()
+
+    def checkpoint(self):
+        """Block while paused; return False once the batch is cancelled"""
+        self._running.wait()
+        return not self._cancelled.is_set()
+
+
+def output_file_generator(month, year, centre, room, file, day=None, create=True):
+    """Generate output file path"""
+    month_full = MONTH_FULL_MAP.get(month, month)
+
+    if day is None:
+        day = 1
+
+    path = os.path.join(file, f"{month_full} {day}", "Word Documents Completed")
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+class DocumentJob:
+    """One document to render: its row, final output path and template values"""
+    __slots__ = ("index", "file_name", "output_path", "replacements", "centre", "room", "original", "copies")
+
+    def __init__(self, index, file_name, output_path, replacements, centre="", room="", original=None):
+        self.index = index
+        self.file_name = file_name
+        self.output_path = output_path
+        self.replacements = replacements
+        self.centre = centre
+        self.room = room
+        # The earlier job with the same values, whose output this one is copied from
+        self.original = original
+        # Number of jobs copied from this one
+        self.copies = 0
+
+    def __repr__(self):
+        return f"DocumentJob({self.index!r}, {self.output_path!r})"
+
+
+class OutputPathIndex:
+    """Planned output paths for a batch, with one directory listing per folder
+
+    With template_digest, folder manifests let a re-run skip documents that
+    are up to date (force renders every row again). create_folders=False
+    plans archive entries only; extension replaces the .docx of names.
+    """
+    def __init__(self, output_directory, template_digest=None, force=False, metrics=None, create_folders=True,
+                 extension=".docx"):
+        self.output_directory = output_directory
+        self.metrics = metrics
+        self.create_folders = create_folders
+        self.extension = extension
+        self.template_digest = template_digest
+        self.force = force
+        self.folders = {}
+        self.taken = {}
+        self.next_suffix = {}
+        self.listed = {}
+        self.manifests = {}
+        self.occurrences = {}
+        self.pending = {}
+        self.up_to_date = 0
+        self.last_save = time.monotonic()
+        # First job planned for each set of template values, across chunks
+        self.originals = {}
+
+    @property
+    def incremental(self):
+        return self.template_digest is not None
+
+    def folder(self, month, year, day):
+        """Create (once) and return the folder for an exam day"""
+        key = (month, year, day)
+        if key not in self.folders:
+            started = time.perf_counter()
+            path = output_file_generator(month, year, None, None, self.output_directory, day, self.create_folders)
+            self.folders[key] = path
+            # Windows paths compare case-insensitively
+            if self.create_folders:
+                self.taken[path] = {os.path.normcase(entry.name) for entry in os.scandir(path)}
+            else:
+                self.taken[path] = set()
+            if self.incremental:
+                manifest = FolderManifest(path)
+                self.manifests[path] = manifest
+                self.listed[path] = set(self.taken[path])
+                # Names owned by earlier runs stay reserved even if the file was deleted
+                self.taken[path].update(os.path.normcase(entry["file"]) for entry in manifest.entries.values())
+            if self.metrics:
+                self.metrics.observe("directories", time.perf_counter() - started)
+        return self.folders[key]
+
+    def claim(self, folder, file_name):
+        """Reserve the first free name for file_name in folder and return its path"""
+        taken = self.taken[folder]
+        stem = file_name[:-5]
+        candidate = stem + self.extension
+        counter = self.next_suffix.get((folder, file_name), 1)
+        if os.path.normcase(candidate) in taken:
+            candidate = f"{stem}_{counter}{self.extension}"
+            while os.path.normcase(candidate) in taken:
+                counter += 1
+                candidate = f"{stem}_{counter}{self.extension}"
+            self.next_suffix[(folder, file_name)] = counter + 1
+        taken.add(os.path.normcase(candidate))
+        return os.path.join(folder, candidate)
+
+    def plan(self, folder, file_name, replacements):
+        """Return the path to render a row to, or None if its document is up to date"""
+        digest = row_digest(self.template_digest, replacements)
+        occurrence = self.occurrences.get((folder, file_name), 0)
+        self.occurrences[(folder, file_name)] = occurrence + 1
+        # Keyed by output name, so .docx and .pdf runs into one folder stay apart
+        name = file_name[:-5] + self.extension
+        key = f"{name}#{occurrence}" if occurrence else name
+
+        manifest = self.manifests[folder]
+        entry = manifest.get(key)
+        if entry is None:
+            output_path = self.claim(folder, file_name)
+            stored_name = os.path.basename(output_path)
+        else:
+            stored_name = entry["file"]
+            output_path = os.path.join(folder, stored_name)
+            if not self.force and entry["hash"] == digest and os.path.normcase(stored_name) in self.listed[folder]:
+                self.up_to_date += 1
+                return None
+
+        # Recorded as unfinished until complete() confirms the write
+        manifest.record(key, stored_name, None)
+        self.pending[output_path] = (manifest, key, stored_name, digest)
+        return output_path
+
+    def complete(self, output_path):
+        """Record a planned document as written"""
+        pending = self.pending.pop(output_path, None)
+        if pending is None:
+            return
+        manifest, key, stored_name, digest = pending
+        manifest.record(key, stored_name, digest)
+        if time.monotonic() - self.last_save >= MANIFEST_SAVE_SECONDS:
+            self.save()
+
+    def save(self):
+        """Write every changed folder manifest"""
+        for manifest in self.manifests.values():
+            manifest.save()
+        self.last_save = time.monotonic()
+
+
+def build_jobs(df, output_directory, paths=None):
+    """Turn the prepared dataframe into render jobs with final output paths
+
+    Pass the same OutputPathIndex to every chunk of a sheet so _N suffixes
+    continue. Returns (jobs, skipped), skipped listing (row number, student,
+    error) for the rows prepare_columns flagged.
+    """
+    if df.empty:
+        return [], []
+
+    # Columns as Python strings, formatted the way an f-string would
+    text = {column: df[column].map(str) for column in (
+        "Student", "ID", "Month", "Day", "Year", "Course_Name", "Course_Code", "Course_Section", "First_Name"
+    )}
+    names = text["Student"]
+    ids = text["ID"]
+    dates = text["Month"] + " " + df["Day"].map("{:02d}".format) + ", " + text["Year"]
+    courses = text["Course_Name"] + " " + text["Course_Code"] + " " + text["Course_Section"]
+    # Last_Name is all NaN, not text, when every Student in the frame is blank
+    last_name_initials = df["Last_Name"].fillna("").astype(str).str[:1]
+    file_names = (
+        text["First_Name"] + "." + last_name_initials + "." + text["Month"] + "." + text["Day"] + "."
+        + text["Year"] + "." + text["Course_Name"] + "." + text["Course_Code"] + "."
+        + text["Course_Section"] + ".docx"
+    )
+
+    if paths is None:
+        paths = OutputPathIndex(output_directory)
+
+    jobs = []
+    skipped = []
+    rows = zip(
+        df.index, df["Error"], names, ids, dates, courses, file_names, df["Month"], df["Year"], df["Day"],
+        df["Centre"], df["Room"]
+    )
+    for index, error, name, id, date, course, file_name, month, year, day, centre, room in rows:
+        if error:
+            skipped.append((index + 1, name, error))
+            continue
+
+        replacements = {"{{Name}}": name, "{{ID}}": id, "{{Date}}": date, "{{Course}}": course}
+
+        # Handle duplicates, both on disk and earlier in this batch
+        folder = paths.folder(month, year, day)
+        if paths.incremental:
+            output_path = paths.plan(folder, file_name, replacements)
+            if output_path is None:
+                continue
+        else:
+            output_path = paths.claim(folder, file_name)
+
+        # A row repeating an earlier row's values is copied from its document
+        key = (name, id, date, course)
+        original = paths.originals.get(key)
+        job = DocumentJob(index, file_name, output_path, replacements, centre, room, original)
+        if original is None:
+            paths.originals[key] = job
+        else:
+            original.copies += 1
+        jobs.append(job)
+
+    paths.save()
+    return jobs, skipped
+
+
+def build_jobs_for_dates(df, dates, output_directory, paths=None):
+    """build_jobs for several exam dates from one prepared dataframe, sharing one OutputPathIndex
+
+    Returns (jobs, skipped); an invalid row is listed once, not per date.
+    """
+    # Imported here so worker processes, which import this module, do not load pandas
+    from docgen_sheet import apply_date
+
+    if paths is None:
+        paths = OutputPathIndex(output_directory)
+    jobs = []
+    skipped = []
+    for exam_date in dates:
+        date_jobs, date_skipped = build_jobs(apply_date(df, exam_date), output_directory, paths)
+        jobs.extend(date_jobs)
+        # The same rows are invalid on every date
+        skipped = date_skipped
+    return jobs, skipped
+
+
+def dates_label(dates):
+    """Human-readable name for a batch of exam dates, e.g. for archive names"""
+    first, last = min(dates), max(dates)
+    if first == last:
+        return f"{first:%B} {first.day}"
+    return f"{first:%B} {first.day} to {last:%B} {last.day}"
+
+
+class ArchiveWriter:
+    """Zip archives that rendered documents are appended to as they finish
+
+    group_by "single" writes one archive for the batch; "centre" and "room"
+    one per testing centre or room. At most max_open archives are open.
+    """
+    GROUPS = ("single", "centre", "room")
+
+    def __init__(self, output_directory, group_by="single", name="Cover Sheets", max_open=MAX_OPEN_ARCHIVES):
+        if group_by not in self.GROUPS:
+            raise ValueError(f"Unknown archive grouping: {group_by}")
+        self.output_directory = output_directory
+        self.group_by = group_by
+        self.name = name
+        self.max_open = max(1, max_open)
+        # Archive name -> path of every archive created, and the open ones, least recently used first
+        self.archive_paths = {}
+        self.archives = OrderedDict()
+
+    def archive_name(self, job):
+        if self.group_by == "centre":
+            return f"{self.name} - Centre {job.centre or 'unknown'}.zip"
+        if self.group_by == "room":
+            return f"{self.name} - Centre {job.centre or 'unknown'} Room {job.room or 'unknown'}.zip"
+        return f"{self.name}.zip"
+
+    def open_archive(self, archive_name):
+        """Create a new archive, with a _N suffix if the name is already taken"""
+        os.makedirs(self.output_directory, exist_ok=True)
+        path = os.path.join(self.output_directory, archive_name)
+        counter = 1
+        while os.path.exists(path):
+            path = os.path.join(self.output_directory, f"{archive_name[:-4]}_{counter}.zip")
+            counter += 1
+        return zipfile.ZipFile(path, "w", zipfile.ZIP_STORED)
+
+    def in_order(self, jobs):
+        """jobs grouped by archive, so each archive is mostly written in one go"""
+        if self.group_by == "single":
+            return jobs
+        return sorted(jobs, key=self.archive_name)
+
+    def archive(self, archive_name):
+        """The open archive for archive_name, closing the least recently used beyond max_open"""
+        if archive_name in self.archives:
+            self.archives.move_to_end(archive_name)
+            return self.archives[archive_name]
+        if archive_name in self.archive_paths:
+            archive = zipfile.ZipFile(self.archive_paths[archive_name], "a", zipfile.ZIP_STORED)
+        else:
+            archive = self.open_archive(archive_name)
+            self.archive_paths[archive_name] = archive.filename
+        self.archives[archive_name] = archive
+        while len(self.archives) > self.max_open:
+            self.archives.popitem(last=False)[1].close()
+        return archive
+
+    def add(self, job, data):
+        """Append one rendered document to its archive"""
+        entry = os.path.relpath(job.output_path, self.output_directory).replace(os.sep, "/")
+        self.archive(self.archive_name(job)).writestr(entry, data)
+
+    @property
+    def paths(self):
+        return list(self.archive_paths.values())
+
+    def close(self):
+        while self.archives:
+            self.archives.popitem(last=False)[1].close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DocumentWriter:
+    """Write rendered documents to disk on a pool of threads
+
+    write() blocks once max_queued documents are waiting. Finished writes
+    come back from finished() and close() as (job, error, timings).
+    """
+    def __init__(self, threads=WRITER_THREADS, max_queued=WRITER_QUEUE_DOCUMENTS):
+        self.pending = queue.Queue(max_queued)
+        self.done = queue.Queue()
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(max(1, threads))]
+        for thread in self.threads:
+            thread.start()
+
+    def write(self, job, data, timings):
+        """Queue data to be written to job.output_path; returns the seconds spent waiting"""
+        started = time.perf_counter()
+        self.pending.put((job, data, dict(timings)))
+        return time.perf_counter() - started
+
+    def _run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            job, data, timings = item
+            started = time.perf_counter()
+            error = None
+            try:
+                with open(job.output_path, "wb") as f:
+                    f.write(data)
+            except OSError as e:
+                error = str(e)
+            timings["save"] = time.perf_counter() - started
+            self.done.put((job, error, timings))
+
+    def finished(self):
+        """Writes completed since the last call"""
+        results = []
+        while True:
+            try:
+                results.append(self.done.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        """Wait for every queued document to be written; returns the remaining results"""
+        for _ in self.threads:
+            self.pending.put(None)
+        for thread in self.threads:
+            thread.join()
+        return self.finished()
+
+
+class DuplicateCopies:
+    """Write jobs planned as copies (job.original) from their original's output instead of rendering them"""
+    def __init__(self, archive=None, planned=True):
+        self.archive = archive
+        # With every job planned up front, an original not seen yet is still to
+        # come; streamed, an original always comes before its copies, which
+        # later chunks may still add once it has finished
+        self.planned = planned
+        # Originals being rendered, copies waiting for them, and the outcome of
+        # finished originals (with the document while archived copies need it)
+        self.pending = set()
+        self.waiting = {}
+        self.results = {}
+
+    def started(self, job):
+        """Note that job was handed to a renderer"""
+        self.pending.add(job)
+
+    def add(self, job):
+        """Results ready for a copy: [] while its original is pending, None if it must be rendered itself"""
+        original = job.original
+        if original in self.results:
+            error, data = self.results[original]
+            if self.archive is None or data is not None or error is not None:
+                return [self.write(job, error, data)]
+        elif original in self.pending or self.planned:
+            self.waiting.setdefault(original, []).append(job)
+            return []
+        # Archived documents are not kept once their planned copies are written
+        original.copies -= 1
+        return None
+
+    def finished(self, job, error, data=None):
+        """Record a rendered job's outcome; returns the results of the copies waiting for it"""
+        self.pending.discard(job)
+        if job.original is not None or (self.planned and not job.copies):
+            return []
+        self.results[job] = (error, data if self.archive is not None and job.copies else None)
+        return [self.write(copy, error, data) for copy in self.waiting.pop(job, [])]
+
+    def write(self, job, error, data):
+        """Copy the original's document to job, returning (job, error, timings)"""
+        original = job.original
+        original.copies -= 1
+        if original.copies <= 0:
+            if self.planned:
+                del self.results[original]
+            else:
+                self.results[original] = (self.results[original][0], None)
+        started = time.perf_counter()
+        if error is None:
+            try:
+                if self.archive is not None:
+                    self.archive.add(job, data)
+                else:
+                    # A copy, not a hard link: re-rendering one file in place later must not change the others
+                    shutil.copyfile(original.output_path, job.output_path)
+            except OSError as e:
+                error = str(e)
+        return job, error, {"reuse": time.perf_counter() - started}
+
+
+def render_jobs(jobs, renderer_name, template_file, workers=1, on_result=None, control=None, options=None,
+                metrics=None, archive=None):
+    """Render every job, serially or in a pool of worker processes
+
+    on_result(job, error) is called in the calling process once per job;
+    error is None on success or the error message. jobs may be a generator
+    fed by a streaming sheet reader. With an ArchiveWriter, documents are
+    appended to the archive instead of written. Returns the number of
+    documents written.
+    """
+    streaming = not hasattr(jobs, "__len__")
+    if archive is not None and not streaming:
+        jobs = archive.in_order(jobs)
+    if workers > 1 and (streaming or len(jobs) >= RENDERERS[renderer_name].parallel_threshold):
+        return _render_parallel(
+            jobs, renderer_name, template_file, workers, on_result, control, options, metrics, archive
+        )
+
+    written = 0
+    started = time.perf_counter()
+    renderer = create_renderer(renderer_name, template_file, options)
+    if metrics:
+        metrics.observe("template", time.perf_counter() - started)
+
+    copies = DuplicateCopies(archive, not streaming)
+
+    def report(job, error, timings, data=None):
+        nonlocal written
+        if error is None:
+            written += 1
+        if metrics:
+            _record_result(metrics, error, timings)
+        if on_result:
+            on_result(job, error)
+        for result in copies.finished(job, error, data):
+            report(*result)
+
+    writer = DocumentWriter() if archive is None and renderer.renders_in_memory else None
+    try:
+        for job in jobs:
+            if control and not control.checkpoint():
+                break
+            if job.original is not None:
+                results = copies.add(job)
+                if results is not None:
+                    for result in results:
+                        report(*result)
+                    continue
+            copies.started(job)
+            error, data = _render_one(renderer, job, archive is not None or writer is not None)
+            timings = dict(renderer.timings)
+            if data is not None and writer is not None:
+                waited = writer.write(job, data, timings)
+                if metrics:
+                    metrics.observe("write_wait", waited)
+                for result in writer.finished():
+                    report(*result)
+                continue
+            if data is not None:
+                timings["archive"] = _archive_add(archive, job, data)
+            report(job, error, timings, data)
+    finally:
+        # Documents already rendered are still written, also after cancel
+        if writer is not None:
+            for result in writer.close():
+                report(*result)
+        renderer.close()
+    return written
+
+
+def render_merged(jobs, template_file, paths, on_result=None, control=None, metrics=None):
+    """Render the jobs as one merged document per exam day, centre and room
+
+    paths is the OutputPathIndex the jobs were planned with; on_result(job,
+    error) is called for every cover sheet. Returns a list of
+    (output_path, cover_sheets) for the merged documents written.
+    """
+    started = time.perf_counter()
+    template = MergedTemplate.from_file(template_file)
+    if metrics:
+        metrics.observe("template", time.perf_counter() - started)
+
+    groups = {}
+    for job in jobs:
+        groups.setdefault((os.path.dirname(job.output_path), job.centre, job.room), []).append(job)
+
+    merged = []
+    for (folder, centre, room), group in groups.items():
+        if control and not control.checkpoint():
+            break
+        output_path = paths.claim(folder, f"Centre {centre or 'unknown'} Room {room or 'unknown'}.docx")
+        timings = {}
+        try:
+            started = time.perf_counter()
+            data = template.render([job.replacements for job in group])
+            rendered = time.perf_counter()
+            with open(output_path, "wb") as f:
+                f.write(data)
+            timings = {"render": rendered - started, "save": time.perf_counter() - rendered}
+            error = None
+            merged.append((output_path, len(group)))
+        except Exception as e:
+            error = str(e)
+        if metrics:
+            metrics.observe_all(timings)
+            metrics.count("merged_documents" if error is None else "merged_failed")
+            metrics.count("documents_written" if error is None else "documents_failed", len(group))
+        if on_result:
+            for job in group:
+                on_result(job, error)
+    return merged
+
+
+def render_pdf(jobs, template_file, workers=1, on_result=None, control=None, metrics=None):
+    """Render the jobs, planned with a ".pdf" OutputPathIndex, to PDF; returns the number written"""
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    workers = max(1, workers)
+    converter = PdfConverter(workers)
+    started = time.perf_counter()
+    renderer = NativeRenderer(template_file)
+    if metrics:
+        metrics.observe("template", time.perf_counter() - started)
+
+    written = 0
+    staging = tempfile.mkdtemp(prefix="docgen-pdf-")
+
+    def report(job, error):
+        nonlocal written
+        if error is None:
+            written += 1
+        if metrics:
+            metrics.count("documents_written" if error is None else "documents_failed")
+        if on_result:
+            on_result(job, error)
+
+    def finish(future, batch_dir, batch):
+        try:
+            pdf_paths, seconds = future.result()
+            if metrics:
+                metrics.observe("pdf_convert", seconds)
+        except Exception as e:
+            pdf_paths = [None] * len(batch)
+            failure = f"PDF conversion failed: {e}"
+        else:
+            failure = "LibreOffice could not convert the document"
+        for job, pdf_path in zip(batch, pdf_paths):
+            error = failure if pdf_path is None else None
+            if error is None:
+                try:
+                    shutil.move(pdf_path, job.output_path)
+                except OSError as e:
+                    error = str(e)
+            report(job, error)
+        shutil.rmtree(batch_dir, ignore_errors=True)
+
+    try:
+        # The native engine fills the next batch while up to workers batches are converted
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = {}
+            for number, batch in enumerate(_pdf_batches(jobs, PDF_BATCH_SIZE)):
+                if control and not control.checkpoint():
+                    break
+                batch_dir = os.path.join(staging, str(number))
+                os.makedirs(os.path.join(batch_dir, "pdf"))
+                staged_jobs = []
+                staged_paths = []
+                for job in batch:
+                    docx_path = os.path.join(batch_dir, os.path.basename(job.output_path)[:-4] + ".docx")
+                    error, _ = _render_one(renderer, DocumentJob(job.index, job.file_name, docx_path, job.replacements))
+                    if error is not None:
+                        report(job, error)
+                        continue
+                    if metrics:
+                        metrics.observe_all(renderer.timings)
+                    staged_jobs.append(job)
+                    staged_paths.append(docx_path)
+                if staged_jobs:
+                    future = pool.submit(_convert_batch, converter, staged_paths, os.path.join(batch_dir, "pdf"))
+                    in_flight[future] = (batch_dir, staged_jobs)
+
+                # Keep a bounded number of batches staged ahead of the converters
+                while len(in_flight) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(future, *in_flight.pop(future))
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future, *in_flight.pop(future))
+    finally:
+        renderer.close()
+        shutil.rmtree(staging, ignore_errors=True)
+    return written
+
+
+def _pdf_batches(jobs, batch_size):
+    """Group jobs into batches of up to batch_size that share an output folder"""
+    pending = {}
+    for job in jobs:
+        folder = os.path.dirname(job.output_path)
+        batch = pending.setdefault(folder, [])
+        batch.append(job)
+        if len(batch) == batch_size:
+            yield pending.pop(folder)
+    yield from pending.values()
+
+
+def _convert_batch(converter, docx_paths, output_directory):
+    """Convert one staged batch, returning (pdf paths, seconds taken)"""
+    started = time.perf_counter()
+    pdf_paths = converter.convert(docx_paths, output_directory)
+    return pdf_paths, time.perf_counter() - started
+
+
+def _render_parallel(jobs, renderer_name, template_file, workers, on_result, control, options, metrics, archive):
+    """Split jobs into chunks and render them in a bounded process pool"""
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    chunk_size = RENDERERS[renderer_name].max_chunk_size
+    if hasattr(jobs, "__len__"):
+        workers = min(workers, len(jobs))
+        chunk_size = max(1, min(chunk_size, -(-len(jobs) // (workers * CHUNKS_PER_WORKER))))
+    max_in_flight = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+
+    written = 0
+    copies = DuplicateCopies(archive, hasattr(jobs, "__len__"))
+    # Copies written while the job stream is read, reported by the main loop
+    ready = deque()
+
+    def report(job, error, timings, data=None):
+        nonlocal written
+        if error is None:
+            written += 1
+        if metrics:
+            _record_result(metrics, error, timings)
+        if on_result:
+            on_result(job, error)
+        ready.extend(copies.finished(job, error, data))
+
+    def to_render():
+        for job in jobs:
+            if job.original is not None:
+                results = copies.add(job)
+                if results is not None:
+                    ready.extend(results)
+                    continue
+            copies.started(job)
+            yield job
+
+    chunks = _chunked(to_render(), chunk_size)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(renderer_name, template_file, options)
+    ) as executor:
+        in_flight = {}
+
+        def submit_more():
+            while len(in_flight) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                in_flight[executor.submit(_render_chunk, chunk, archive is not None)] = chunk
+
+        submit_more()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = in_flight.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    results = [(f"Worker failed: {e}", {}, None)] * len(chunk)
+                for job, (error, timings, data) in zip(chunk, results):
+                    if data is not None:
+                        timings["archive"] = _archive_add(archive, job, data)
+                    report(job, error, timings, data)
+            # Chunks already handed out finish; nothing new starts while paused or after cancel
+            if control is None or control.checkpoint():
+                submit_more()
+            while ready:
+                report(*ready.popleft())
+    while ready:
+        report(*ready.popleft())
+    return written
+
+
+def _chunked(jobs, chunk_size):
+    """Yield lists of up to chunk_size jobs without materialising the rest"""
+    iterator = iter(jobs)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _record_result(metrics, error, timings):
+    """Count a finished job and record its per-stage timings"""
+    metrics.count("documents_written" if error is None else "documents_failed")
+    if "reuse" in timings:
+        metrics.count("documents_reused")
+    metrics.observe_all(timings)
+
+
+def _archive_add(archive, job, data):
+    """Append a rendered document to the archive and return the seconds it took"""
+    started = time.perf_counter()
+    archive.add(job, data)
+    return time.perf_counter() - started
+
+
+def _render_one(renderer, job, in_memory=False):
+    """Render a single job, returning (error, data)
+
+    error is None or the error message; data holds the document's bytes when
+    rendered in memory, otherwise it is written to job.output_path.
+    """
+    try:
+        if in_memory:
+            return None, renderer.render_bytes(job.replacements)
+        renderer.render(job.replacements, job.output_path)
+        return None, None
+    except Exception as e:
+        return str(e), None
+
+
+# Renderer owned by a worker process, opened once by _init_worker, and the
+# time opening it took, reported with the worker's first result
+_worker_renderer = None
+_worker_setup_seconds = None
+
+
+def _init_worker(renderer_name, template_file, options):
+    """Give each worker process its own template handle or Word session"""
+    global _worker_renderer, _worker_setup_seconds
+    started = time.perf_counter()
+    _worker_renderer = create_renderer(renderer_name, template_file, options)
+    _worker_setup_seconds = time.perf_counter() - started
+    # Runs when the worker shuts down, so Word instances are not left behind
+    multiprocessing.util.Finalize(_worker_renderer, _worker_renderer.close, exitpriority=10)
+
+
+def _render_chunk(chunk, in_memory=False):
+    """Render a chunk of jobs inside a worker process, with each job's timings"""
+    global _worker_setup_seconds
+    results = []
+    for job in chunk:
+        error, data = _render_one(_worker_renderer, job, in_memory)
+        results.append((error, dict(_worker_renderer.timings), data))
+    if _worker_setup_seconds is not None:
+        results[0][1]["template"] = _worker_setup_seconds
+        _worker_setup_seconds = None
+    return results
@@ -0,0 +1,653 @@
+import importlib.util
+import io
+import os
+import re
+import shutil
+import signal
+import sys
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+import zlib
+
+# pywin32 takes a while to import, so only check for it here; WordRenderer
+# imports it when a Word session is actually opened (not available on Linux)
+WORD_AVAILABLE = importlib.util.find_spec("win32com") is not None
+
+# Story parts of the template that can hold {{...}} placeholders: body,
+# headers, footers and notes
+STORY_PART_RE = re.compile(r"^word/(?:document|header\d*|footer\d*|footnotes|endnotes)\.xml$")
+
+# Text nodes inside a WordprocessingML part
+TEXT_NODE_RE = re.compile(r"(<w:t(?:\s[^>]*)?>)(.*?)(</w:t>)", re.DOTALL)
+
+# Paragraph boundaries - a placeholder never spans two paragraphs
+PARAGRAPH_BOUNDARY_RE = re.compile(r"<w:p[\s>/]|</w:p>")
+
+PLACEHOLDER_RE = re.compile(r"\{\{\w+\}\}")
+
+# Merged output: the body and its final section properties, the header and
+# footer references of a section, package relationships and content type
+# overrides, and ids that must stay unique when content is repeated
+BODY_RE = re.compile(r"(<w:body>)(.*)(<w:sectPr\b.*?</w:sectPr>)(\s*</w:body>)", re.DOTALL)
+STORY_REFERENCE_RE = re.compile(r'<w:(?:header|footer)Reference\b[^>]*?r:id="([^"]+)"')
+RELATIONSHIP_RE = re.compile(r"<Relationship\s[^>]*/>")
+OVERRIDE_RE = re.compile(r'<Override\s[^>]*PartName="([^"]+)"[^>]*/>')
+ATTRIBUTE_RE = re.compile(r'([\w:]+)="([^"]*)"')
+UNIQUE_ID_RE = re.compile(r'\sw14:(?:paraId|textId)="[^"]*"')
+
+# Zip record layouts (see APPNOTE.TXT)
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+ZIP_VERSION = 20
+UTF8_FLAG = 0x800
+
+# Word session management: documents per Word process before it is
+# restarted (Word's memory use creeps up over long batches), seconds a
+# document may take before Word is considered hung, and extra attempts
+# for a document after Word failed on it
+WORD_RECYCLE_AFTER = 200
+WORD_DOCUMENT_TIMEOUT = 60
+WORD_RETRIES = 2
+# Seconds to wait for a new Word process's main window, which gives away its process id
+WORD_WINDOW_TIMEOUT = 10
+
+# Word Find/Replace constants
+WD_FIND_STOP = 0
+WD_REPLACE_ALL = 2
+WD_COLLAPSE_END = 0
+# Longest replacement text Find.Execute accepts
+WORD_REPLACE_MAX = 255
+
+
+class PlaceholderSite:
+    """Where a placeholder lives: zip part and the text nodes it spans"""
+    __slots__ = ("part", "placeholder", "nodes")
+
+    def __init__(self, part, placeholder, nodes):
+        self.part = part
+        self.placeholder = placeholder
+        self.nodes = nodes
+
+    def __repr__(self):
+        return f"PlaceholderSite({self.part!r}, {self.placeholder!r}, nodes={self.nodes})"
+
+
+class ZipMember:
+    """A zip entry of the output document, copied from the template or with placeholder slots"""
+    __slots__ = ("name", "flags", "dos_time", "dos_date", "compress_type", "crc",
+                 "compressed", "size", "literals", "slots")
+
+    def __init__(self, info):
+        self.name = info.filename.encode("utf-8")
+        self.flags = UTF8_FLAG if not info.filename.isascii() else 0
+        self.dos_time = (info.date_time[3] << 11) | (info.date_time[4] << 5) | (info.date_time[5] // 2)
+        self.dos_date = ((info.date_time[0] - 1980) << 9) | (info.date_time[1] << 5) | info.date_time[2]
+        self.compress_type = zipfile.ZIP_DEFLATED
+        self.crc = 0
+        self.compressed = b""
+        self.size = 0
+        self.literals = None
+        self.slots = None
+
+    def local_header(self):
+        return LOCAL_HEADER.pack(
+            0x04034B50, ZIP_VERSION, self.flags, self.compress_type, self.dos_time, self.dos_date,
+            self.crc, len(self.compressed), self.size, len(self.name), 0
+        ) + self.name
+
+    def central_header(self, offset):
+        return CENTRAL_HEADER.pack(
+            0x02014B50, ZIP_VERSION, ZIP_VERSION, self.flags, self.compress_type, self.dos_time,
+            self.dos_date, self.crc, len(self.compressed), self.size, len(self.name), 0, 0, 0, 0, 0,
+            offset
+        ) + self.name
+
+
+class TemplatePlan:
+    """A .docx template parsed once and compiled into a placeholder plan"""
+    def __init__(self, data, part_re=STORY_PART_RE):
+        self.members = []
+        self.sites = []
+        with zipfile.ZipFile(io.BytesIO(data)) as zin:
+            for info in zin.infolist():
+                member = ZipMember(info)
+                content = zin.read(info.filename)
+                if part_re.match(info.filename):
+                    literals, slots = self.compile_part(info.filename, content.decode("utf-8"))
+                    if slots:
+                        member.literals = literals
+                        member.slots = slots
+                        self.members.append(member)
+                        continue
+                self.copy_static(member, info, data, content)
+                self.members.append(member)
+
+        # Static members never change, so their local records are built once
+        self.static_records = {
+            id(member): member.local_header() + member.compressed
+            for member in self.members if member.slots is None
+        }
+
+    @classmethod
+    def from_file(cls, template_file):
+        """Load and compile the template at template_file"""
+        with open(template_file, "rb") as f:
+            return cls(f.read())
+
+    @property
+    def placeholders(self):
+        """Placeholders found in the template, in document order"""
+        return list(dict.fromkeys(site.placeholder for site in self.sites))
+
+    def copy_static(self, member, info, data, content):
+        """Take the compressed bytes of an untouched member straight from the template"""
+        member.crc = info.CRC
+        member.size = info.file_size
+        if info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            fields = LOCAL_HEADER.unpack_from(data, info.header_offset)
+            start = info.header_offset + LOCAL_HEADER.size + fields[9] + fields[10]
+            member.compress_type = info.compress_type
+            member.compressed = data[start:start + info.compress_size]
+        else:
+            member.compressed = deflate(content)
+
+    def compile_part(self, part, xml):
+        """Split one XML part into literal byte segments and placeholder slots, per paragraph"""
+        nodes = list(TEXT_NODE_RE.finditer(xml))
+        edits = []
+
+        # Group consecutive text nodes by paragraph
+        groups = []
+        previous_end = None
+        for node in nodes:
+            if previous_end is None or PARAGRAPH_BOUNDARY_RE.search(xml, previous_end, node.start()):
+                groups.append([])
+            groups[-1].append(node)
+            previous_end = node.end()
+
+        node_index = {node.start(): i for i, node in enumerate(nodes)}
+        preserved = set()
+        for group in groups:
+            text = "".join(node.group(2) for node in group)
+            offsets = []
+            position = 0
+            for node in group:
+                offsets.append(position)
+                position += len(node.group(2))
+
+            for match in PLACEHOLDER_RE.finditer(text):
+                covered = [
+                    i for i, node in enumerate(group)
+                    if offsets[i] < match.end() and offsets[i] + len(node.group(2)) > match.start()
+                ]
+                for n, i in enumerate(covered):
+                    node = group[i]
+                    start = node.start(2) + max(match.start() - offsets[i], 0)
+                    end = node.start(2) + min(match.end() - offsets[i], len(node.group(2)))
+                    # The value, or the text left after trimming, may start or end with a space
+                    opening = node.group(1)
+                    if "xml:space" not in opening and node.start() not in preserved:
+                        preserved.add(node.start())
+                        edits.append((node.start(1), node.end(1), opening[:-1] + ' xml:space="preserve">'))
+                    if n == 0:
+                        edits.append((start, end, None, match.group()))
+                    else:
+                        edits.append((start, end, ""))
+                self.sites.append(PlaceholderSite(part, match.group(), [node_index[group[i].start()] for i in covered]))
+
+        literals = []
+        slots = []
+        position = 0
+        chunk = []
+        for edit in sorted(edits, key=lambda e: e[0]):
+            chunk.append(xml[position:edit[0]])
+            if edit[2] is None:
+                literals.append("".join(chunk).encode("utf-8"))
+                slots.append(edit[3])
+                chunk = []
+            else:
+                chunk.append(edit[2])
+            position = edit[1]
+        chunk.append(xml[position:])
+        literals.append("".join(chunk).encode("utf-8"))
+        return literals, slots
+
+    def render(self, replacements):
+        """Return the bytes of a new .docx with the placeholders replaced"""
+        values = {
+            placeholder: escape_xml(str(replacements.get(placeholder, placeholder))).encode("utf-8")
+            for placeholder in self.placeholders
+        }
+
+        records = []
+        central = []
+        offset = 0
+        for member in self.members:
+            if member.slots is None:
+                record = self.static_records[id(member)]
+            else:
+                pieces = [member.literals[0]]
+                for slot, literal in zip(member.slots, member.literals[1:]):
+                    pieces.append(values[slot])
+                    pieces.append(literal)
+                content = b"".join(pieces)
+                member.crc = zlib.crc32(content)
+                member.size = len(content)
+                member.compressed = deflate(content)
+                record = member.local_header() + member.compressed
+            central.append(member.central_header(offset))
+            records.append(record)
+            offset += len(record)
+
+        central_directory = b"".join(central)
+        records.append(central_directory)
+        records.append(END_OF_CENTRAL_DIR.pack(
+            0x06054B50, 0, 0, len(self.members), len(self.members), len(central_directory), offset, 0
+        ))
+        return b"".join(records)
+
+
+def escape_xml(value):
+    """Escape text for an XML text node"""
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def deflate(content):
+    """Raw deflate stream as stored in a zip member"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(content) + compressor.flush()
+
+
+class MergedTemplate:
+    """Template compiled for merged output: one section per cover sheet, each with its own header and footer copies"""
+    def __init__(self, data):
+        self.plan = TemplatePlan(data)
+        with zipfile.ZipFile(io.BytesIO(data)) as zin:
+            self.order = zin.namelist()
+            self.parts = {name: zin.read(name) for name in self.order}
+
+        document = self.parts["word/document.xml"].decode("utf-8")
+        match = BODY_RE.search(document)
+        if match is None:
+            raise ValueError("Template body has no section properties")
+        self.document_head = document[:match.end(1)].encode("utf-8")
+        self.document_tail = document[match.start(4):].encode("utf-8")
+        self.section = match.group(3)
+        self.body = self.compile("word/document.xml", match.group(2))
+
+        self.relationships = self.parts["word/_rels/document.xml.rels"].decode("utf-8")
+        relationships = {}
+        elements = {}
+        for element in RELATIONSHIP_RE.findall(self.relationships):
+            attributes = dict(ATTRIBUTE_RE.findall(element))
+            relationships[attributes["Id"]] = attributes
+            elements[attributes["Id"]] = element
+
+        # Header and footer parts that need a copy per section
+        self.story_parts = {}
+        for rel_id in dict.fromkeys(STORY_REFERENCE_RE.findall(self.section)):
+            part = "word/" + relationships[rel_id]["Target"]
+            literals, slots = self.compile(part, self.parts[part].decode("utf-8"))
+            if slots:
+                self.story_parts[rel_id] = (part, relationships[rel_id]["Type"], literals, slots)
+                # The original part is replaced by its per-section copies
+                self.relationships = self.relationships.replace(elements[rel_id], "")
+
+        for part in ("word/footnotes.xml", "word/endnotes.xml"):
+            if part in self.parts and self.compile(part, self.parts[part].decode("utf-8"))[1]:
+                raise ValueError(f"Merged output does not support placeholders in {part}")
+
+        self.content_types = {
+            match.group(1): match.group(0)
+            for match in OVERRIDE_RE.finditer(self.parts["[Content_Types].xml"].decode("utf-8"))
+        }
+
+    @classmethod
+    def from_file(cls, template_file):
+        with open(template_file, "rb") as f:
+            return cls(f.read())
+
+    def compile(self, part, xml):
+        """Compile repeated content, without the ids Word expects to be unique"""
+        return self.plan.compile_part(part, UNIQUE_ID_RE.sub("", xml))
+
+    def render(self, documents):
+        """Return the bytes of one .docx holding a section per replacements dict"""
+        if not documents:
+            raise ValueError("A merged document needs at least one cover sheet")
+        body = [self.document_head]
+        added_parts = []
+        added_relationships = []
+        for number, replacements in enumerate(documents, 1):
+            values = {
+                placeholder: escape_xml(str(replacements.get(placeholder, placeholder))).encode("utf-8")
+                for placeholder in self.plan.placeholders
+            }
+            section = self.section
+            for rel_id, (part, rel_type, literals, slots) in self.story_parts.items():
+                copy = f"{part[:-4]}-{number}.xml"
+                copy_id = f"{rel_id}s{number}"
+                added_parts.append((part, copy, splice(literals, slots, values)))
+                added_relationships.append(f'<Relationship Id="{copy_id}" Type="{rel_type}" Target="{copy[5:]}"/>')
+                section = section.replace(f'r:id="{rel_id}"', f'r:id="{copy_id}"')
+
+            body.append(splice(*self.body, values))
+            if number < len(documents):
+                body.append(f"<w:p><w:pPr>{section}</w:pPr></w:p>".encode("utf-8"))
+            else:
+                body.append(section.encode("utf-8"))
+        body.append(self.document_tail)
+
+        replaced = {story[0] for story in self.story_parts.values()}
+        overrides = [
+            self.content_types[f"/{part}"].replace(f'"/{part}"', f'"/{copy}"')
+            for part, copy, _ in added_parts
+        ]
+        content_types = self.parts["[Content_Types].xml"].decode("utf-8")
+        for part in replaced:
+            content_types = content_types.replace(self.content_types[f"/{part}"], "")
+        content_types = content_types.replace("</Types>", "".join(overrides) + "</Types>")
+        relationships = self.relationships.replace("</Relationships>", "".join(added_relationships) + "</Relationships>")
+
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zout:
+            for name in self.order:
+                if name in replaced or name in {f"word/_rels/{part[5:]}.rels" for part in replaced}:
+                    continue
+                if name == "[Content_Types].xml":
+                    zout.writestr(name, content_types)
+                elif name == "word/document.xml":
+                    zout.writestr(name, b"".join(body))
+                elif name == "word/_rels/document.xml.rels":
+                    zout.writestr(name, relationships)
+                else:
+                    zout.writestr(name, self.parts[name])
+            for part, copy, content in added_parts:
+                zout.writestr(copy, content)
+                part_rels = f"word/_rels/{part[5:]}.rels"
+                if part_rels in self.parts:
+                    zout.writestr(f"word/_rels/{copy[5:]}.rels", self.parts[part_rels])
+        return output.getvalue()
+
+
+def splice(literals, slots, values):
+    """Join compiled literal segments with the encoded values of their slots"""
+    pieces = [literals[0]]
+    for slot, literal in zip(slots, literals[1:]):
+        pieces.append(values[slot])
+        pieces.append(literal)
+    return b"".join(pieces)
+
+
+class NativeRenderer:
+    """Fill the template directly in its OOXML parts, no Word required"""
+    name = "native"
+    label = "Native (no Word)"
+    # Renders thousands of documents a second, so a worker pool only pays
+    # off once its start-up cost is small next to the batch
+    parallel_threshold = 5000
+    max_chunk_size = 500
+    # Documents are rendered to bytes, so writing them can overlap rendering
+    renders_in_memory = True
+
+    def __init__(self, template_file):
+        self.plan = TemplatePlan.from_file(template_file)
+        # Seconds per stage of the last document rendered
+        self.timings = {}
+
+    def render(self, replacements, output_path):
+        """Render one document and write it to output_path"""
+        data = self.render_bytes(replacements)
+        started = time.perf_counter()
+        with open(output_path, "wb") as f:
+            f.write(data)
+        self.timings["save"] = time.perf_counter() - started
+
+    def render_bytes(self, replacements):
+        """Render one document and return its bytes"""
+        started = time.perf_counter()
+        data = self.plan.render(replacements)
+        self.timings = {"render": time.perf_counter() - started}
+        return data
+
+    def close(self):
+        pass
+
+
+def open_word_application():
+    """Start a private Word process (DispatchEx, never the user's) and return (application, pid)"""
+    import win32com.client
+    import win32gui
+    import win32process
+    application = win32com.client.DispatchEx("Word.Application")
+    application.Visible = False
+    # wdAlertsNone: a modal dialog would block the session forever
+    application.DisplayAlerts = 0
+    caption = f"DocGen {uuid.uuid4().hex}"
+    application.Caption = caption
+    # The window can lag behind the caption change on a busy machine
+    deadline = time.monotonic() + WORD_WINDOW_TIMEOUT
+    window = win32gui.FindWindow("OpusApp", caption)
+    while not window and time.monotonic() < deadline:
+        time.sleep(0.1)
+        window = win32gui.FindWindow("OpusApp", caption)
+    pid = win32process.GetWindowThreadProcessId(window)[1] if window else None
+    return application, pid
+
+
+class WordSession:
+    """One Word process owned by a WordRenderer"""
+    def __init__(self, application, pid):
+        self.application = application
+        self.pid = pid
+        self.documents = 0
+        self.killed = False
+
+    def healthy(self):
+        """Cheap round trip to check that Word still answers"""
+        try:
+            self.application.Documents.Count
+            return True
+        except Exception:
+            return False
+
+    def kill(self):
+        """Terminate the Word process; a COM call blocked on it then fails"""
+        self.killed = True
+        if self.pid:
+            try:
+                os.kill(self.pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def quit(self):
+        """Close Word normally, or kill it if it does not respond"""
+        try:
+            self.application.Quit(SaveChanges=0)
+        except Exception:
+            self.kill()
+
+
+class WordRenderer:
+    """Fill the template through Microsoft Word, replacing a Word process that hangs, crashes or is due a recycle"""
+    name = "word"
+    label = "Microsoft Word"
+    # About a second per document, so even small batches are worth splitting
+    parallel_threshold = 4
+    max_chunk_size = 5
+    # Word saves each document itself, from inside its own process
+    renders_in_memory = False
+
+    def __init__(self, template_file, recycle_after=WORD_RECYCLE_AFTER, timeout=WORD_DOCUMENT_TIMEOUT,
+                 retries=WORD_RETRIES, application_factory=None):
+        self.com_initialized = False
+        # application_factory returns (application, pid); tests pass a fake Word
+        if application_factory is None:
+            if not WORD_AVAILABLE:
+                raise RuntimeError("Microsoft Word backend requires pywin32 (pip install pywin32)")
+            import pythoncom
+            # COM must be initialised on every thread that talks to Word
+            pythoncom.CoInitialize()
+            self.com_initialized = True
+            application_factory = open_word_application
+        self.template_file = os.path.abspath(os.path.normpath(template_file))
+        self.recycle_after = recycle_after
+        self.timeout = timeout
+        self.retries = retries
+        self.application_factory = application_factory
+        self.restarts = 0
+        # Seconds per stage of the last document rendered
+        self.timings = {}
+        self.scratch_dir = None
+        self.session = self.open_session()
+
+    def open_session(self):
+        application, pid = self.application_factory()
+        if not pid:
+            # Without a pid a hung Word could not be killed and the batch would block forever
+            try:
+                application.Quit(SaveChanges=0)
+            except Exception:
+                pass
+            raise RuntimeError("Could not find the process id of the Word instance started for rendering")
+        return WordSession(application, pid)
+
+    def ready_session(self):
+        """Return a Word session fit for the next document, replacing a stale one"""
+        session = self.session
+        if session is not None and session.documents >= self.recycle_after:
+            session.quit()
+            session = None
+        elif session is not None and not session.healthy():
+            session.kill()
+            session = None
+        if session is None:
+            self.restarts += 1
+            started = time.perf_counter()
+            session = self.session = self.open_session()
+            self.timings["word_start"] = self.timings.get("word_start", 0.0) + time.perf_counter() - started
+        return session
+
+    def render(self, replacements, output_path):
+        """Render one document through Word and save it to output_path"""
+        self.timings = {}
+        for attempt in range(self.retries + 1):
+            session = self.ready_session()
+            watchdog = threading.Timer(self.timeout, session.kill)
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                self.render_in(session, replacements, output_path)
+                session.documents += 1
+                return
+            except Exception as e:
+                error = e
+            finally:
+                watchdog.cancel()
+
+            if session.killed:
+                error = TimeoutError(f"Word did not finish the document within {self.timeout}s")
+            elif session.healthy():
+                # Word is fine, so the document itself is the problem; retrying will not help
+                raise error
+            session.kill()
+            self.session = None
+        raise RuntimeError(f"Word failed {self.retries + 1} times: {error}")
+
+    def render_bytes(self, replacements):
+        """Render one document and return its bytes"""
+        # Word can only save to a file
+        if self.scratch_dir is None:
+            self.scratch_dir = tempfile.mkdtemp(prefix="docgen-word-")
+        scratch_path = os.path.join(self.scratch_dir, "document.docx")
+        self.render(replacements, scratch_path)
+        try:
+            with open(scratch_path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(scratch_path)
+
+    def render_in(self, session, replacements, output_path):
+        # The template is opened read-only where it is installed and saved under the new name, without a temp copy
+        started = time.perf_counter()
+        doc = session.application.Documents.Open(self.template_file, ReadOnly=True, AddToRecentFiles=False,
+                                                 Visible=False)
+        opened = time.perf_counter()
+        self.timings["open"] = opened - started
+        try:
+            self.replace_placeholders(doc, replacements)
+            replaced = time.perf_counter()
+            self.timings["render"] = replaced - opened
+            doc.SaveAs(output_path, FileFormat=16)
+            self.timings["save"] = time.perf_counter() - replaced
+        finally:
+            doc.Close(SaveChanges=False)
+
+    def replace_placeholders(self, doc, replacements):
+        """Replace the placeholders in every story with one Find.Execute ReplaceAll per placeholder"""
+        # Header and footer stories are only listed once one has been touched
+        doc.Sections(1).Headers(1).Range.StoryType
+        for story in doc.StoryRanges:
+            # Linked stories, e.g. the header of each further section
+            while story is not None:
+                find = story.Find
+                for placeholder, value in replacements.items():
+                    value = str(value)
+                    if len(value) > WORD_REPLACE_MAX:
+                        self.replace_long(story, placeholder, value)
+                        continue
+                    # "^" starts a special character code in the replacement text
+                    find.Execute(FindText=placeholder, MatchCase=True, Wrap=WD_FIND_STOP,
+                                 ReplaceWith=value.replace("^", "^^"), Replace=WD_REPLACE_ALL)
+                story = story.NextStoryRange
+
+    def replace_long(self, story, placeholder, value):
+        """Replace a placeholder with text too long for Find.Execute"""
+        found = story.Duplicate
+        while found.Find.Execute(FindText=placeholder, MatchCase=True, Wrap=WD_FIND_STOP):
+            found.Text = value
+            found.Collapse(WD_COLLAPSE_END)
+
+    def close(self):
+        if self.session is not None:
+            self.session.quit()
+            self.session = None
+        if self.scratch_dir is not None:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+            self.scratch_dir = None
+        if self.com_initialized:
+            import pythoncom
+            pythoncom.CoUninitialize()
+
+
+RENDERERS = {
+    NativeRenderer.name: NativeRenderer,
+    WordRenderer.name: WordRenderer,
+}
+
+
+def default_template_path():
+    """Template bundled with the executable, or the development copy"""
+    if getattr(sys, 'frozen', False):
+        return os.path.join(sys._MEIPASS, "template.docx")
+    template_file = r"C:\Users\agraw\OneDrive\Desktop\CODE\Work\template.docx"
+    if not os.path.exists(template_file):
+        template_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "template.docx")
+    return template_file
+
+
+def available_renderers():
+    """Return the renderer names usable on this machine"""
+    return [name for name in RENDERERS if name != WordRenderer.name or WORD_AVAILABLE]
+
+
+def create_renderer(name, template_file, options=None):
+    """Instantiate the renderer registered under name, with options as extra keyword arguments"""
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown renderer: {name}")
+    return RENDERERS[name](template_file, **(options or {}))
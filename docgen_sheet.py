@@ -0,0 +1,246 @@
+from datetime import datetime, timedelta
+import pandas as pd
+
+SUPPORTED_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
+# Rows per chunk when a sheet is streamed instead of read whole
+STREAM_CHUNK_ROWS = 5000
+
+MONTH_MAP = {
+    1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr", 5: "May", 6: "Jun",
+    7: "Jul", 8: "Aug", 9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"
+}
+
+
+def read_master_sheet(file_path):
+    """Read the raw master sheet; the column names are on its second row"""
+    if file_path.endswith(".xlsx") or file_path.endswith(".xls"):
+        return pd.read_excel(file_path, header=1)
+    elif file_path.endswith(".csv"):
+        return pd.read_csv(file_path, header=1)
+    raise ValueError("Unsupported file format. Please select an Excel or CSV file.")
+
+
+def load_master_sheet(file_path):
+    """Read the master sheet and prepare it for generation"""
+    return initialize_df(read_master_sheet(file_path))
+
+
+def iter_master_sheet(file_path, chunk_rows=STREAM_CHUNK_ROWS):
+    """Stream the master sheet as prepared chunks of at most chunk_rows rows, one chunk in memory at a time"""
+    if file_path.endswith(".xlsx"):
+        chunks = _iter_xlsx_chunks(file_path, chunk_rows)
+    elif file_path.endswith(".csv"):
+        header = pd.read_csv(file_path, header=1, nrows=0)
+        chunks = pd.read_csv(file_path, header=1, usecols=kept_columns(len(header.columns)), chunksize=chunk_rows)
+    elif file_path.endswith(".xls"):
+        # Legacy .xls cannot be streamed, so it is read whole and sliced
+        df = read_master_sheet(file_path)
+        df = df.drop(columns=df.columns[UNUSED_COLUMNS])
+        chunks = (df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    else:
+        raise ValueError("Unsupported file format. Please select an Excel or CSV file.")
+
+    for chunk in chunks:
+        chunk = prepare_columns(chunk)
+        # A chunk of trailing blank rows prepares to nothing
+        if not chunk.empty:
+            yield chunk
+
+
+def _iter_xlsx_chunks(file_path, chunk_rows):
+    """Raw chunks of the kept columns of an .xlsx sheet, via openpyxl read-only mode"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(min_row=2, values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        kept = kept_columns(len(header))
+        columns = [header[i] if header[i] is not None else f"Unnamed: {i}" for i in kept]
+
+        # Row labels continue across chunks, as in a whole-sheet read
+        start = 0
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in kept])
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=columns, index=range(start, start + len(batch)))
+                start += len(batch)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, index=range(start, start + len(batch)))
+    finally:
+        workbook.close()
+
+
+def apply_date(df, selected_date):
+    """Stamp the exam date into the Day/Month/Year columns"""
+    df['Day'] = selected_date.day
+    df['Month'] = MONTH_MAP[selected_date.month]
+    df['Year'] = selected_date.year
+    return df
+
+
+def date_range(start, end):
+    """Every date from start to end, both included"""
+    if end < start:
+        raise ValueError(f"End date {end:%Y-%m-%d} is before start date {start:%Y-%m-%d}")
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def parse_dates(text):
+    """Exam dates from a comma-separated list of YYYY-MM-DD dates and START..END ranges
+
+    Returns the dates sorted, each once, e.g. "2026-04-21..2026-04-23,2026-04-27".
+    """
+    dates = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, separator, end = part.partition("..")
+        start = datetime.strptime(start.strip(), "%Y-%m-%d")
+        if separator:
+            dates.update(date_range(start, datetime.strptime(end.strip(), "%Y-%m-%d")))
+        else:
+            dates.add(start)
+    if not dates:
+        raise ValueError("No exam date given")
+    return sorted(dates)
+
+
+# Bump whenever initialize_df/prepare_columns change what they produce, so
+# sheets cached by an older version are prepared again
+PREPARE_VERSION = 5
+
+# Columns of a prepared sheet, before apply_date adds the date
+PREPARED_COLUMNS = [
+    "Student", "ID", "Course_Name", "Course_Code", "Course_Section", "First_Name", "Last_Name", "Centre", "Room",
+    "Error",
+]
+
+# Raw sheet columns initialize_df does not use, by position
+UNUSED_COLUMNS = [0, 1, 3, 6, 7, 5, 8, 10, 11]
+
+
+def kept_columns(column_count):
+    """Positions of the raw sheet columns initialize_df keeps"""
+    return [i for i in range(column_count) if i not in UNUSED_COLUMNS]
+
+
+def initialize_df(df):
+    """Initialize dataframe by cleaning and extracting necessary columns"""
+    return prepare_columns(df.drop(columns=df.columns[UNUSED_COLUMNS]))
+
+
+def _strip_text(values):
+    """Strip the strings of a column; numbers in a mixed column (e.g. IDs read by openpyxl) are kept"""
+    if isinstance(values.dtype, pd.StringDtype):
+        return values.str.strip()
+    if values.dtype == object:
+        return values.str.strip().fillna(values)
+    return values
+
+
+def _extract(values, pattern):
+    """Named groups of pattern as columns, "" where a row or optional group does not match"""
+    # pandas' str.extract loops in Python even for pyarrow-backed str columns
+    if isinstance(values.dtype, pd.StringDtype) and values.dtype.storage == "pyarrow":
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        matches = pc.extract_regex(pa.array(values.array), pattern)
+        parts = pd.DataFrame({
+            field.name: pd.Series(column, dtype=values.dtype, index=values.index)
+            for field, column in zip(matches.type, matches.flatten())
+        })
+    else:
+        parts = values.str.extract(pattern)
+    return parts.fillna("")
+
+
+def prepare_columns(df):
+    """Clean the kept sheet columns, derive the columns generation needs and flag invalid rows"""
+    df = pd.DataFrame({column: _strip_text(df[column]) for column in df.columns}, index=df.index)
+    blank = df.isna() | df.eq("")
+    filled = ~blank.all(axis=1)
+    if not filled.all():
+        df = df[filled]
+        blank = blank[filled]
+    if df.empty:
+        return pd.DataFrame(columns=PREPARED_COLUMNS)
+    # (rows, message, offending values quoted after the message)
+    problems = [(blank[column], f"Missing {column}", None) for column in df.columns]
+    course = df["Course"].fillna("").astype(str)
+    student = df["Student"].fillna("").astype(str)
+    booking = df["Room Booking"].fillna("").astype(str)
+
+    # The last column holds the student ID
+    raw_ids = df.iloc[:, -1]
+    if pd.api.types.is_integer_dtype(raw_ids):
+        ids = raw_ids
+    else:
+        numeric_ids = pd.to_numeric(raw_ids, errors="coerce")
+        bad_ids = ~blank.iloc[:, -1] & (numeric_ids.isna() | (numeric_ids % 1 != 0))
+        problems.append((bad_ids, f"Unparsable {df.columns[-1]}", raw_ids))
+        ids = numeric_ids.where(~bad_ids, 0).fillna(0).astype("int64")
+
+    # One regex extract with named groups per source column
+    # Course is "<name> <code> <kind> <section> ...", split on single spaces
+    course_parts = _extract(course, r"^(?P<name>[^ ]+) (?P<code>[^ ]+) [^ ]* (?P<section>[^ ]+)")
+    bad_courses = ~blank["Course"] & (course_parts["name"] == "")
+    problems.append((bad_courses, "Malformed Course", course))
+
+    # First and last word; a single name is both
+    name_parts = _extract(student, r"^(?P<first>\S+)(?:.*\s(?P<last>\S+))?$")
+    last_names = name_parts["last"].where(name_parts["last"] != "", name_parts["first"])
+
+    # Bookings end in "[... <centre>] <room>"; only the digits of the centre are kept
+    booking_parts = _extract(booking, r"^(?:(?:.*\s)?(?P<centre>\S+)\s+)?(?P<room>\S+)$")
+    centres = booking_parts["centre"].str.replace(r"\D+", "", regex=True)
+    rooms = booking_parts["room"]
+    # A booking without a centre (e.g. "Main Hall 101") still names its room
+    bad_bookings = ~blank["Room Booking"] & (rooms == "")
+    problems.append((bad_bookings, "Malformed Room Booking", booking))
+
+    # Every problem of a row, joined with "; "; only flagged rows are touched
+    errors = pd.Series("", index=df.index, dtype=object)
+    for mask, message, values in problems:
+        if mask.any():
+            if values is not None:
+                message = f"{message} \"" + values[mask].astype(object).astype(str) + "\""
+            errors[mask] += message + "; "
+    flagged = errors != ""
+    if flagged.any():
+        errors[flagged] = errors[flagged].str[:-2]
+
+    return pd.DataFrame({
+        "Student": student,
+        "ID": ids,
+        "Course_Name": course_parts["name"],
+        "Course_Code": course_parts["code"],
+        "Course_Section": course_parts["section"],
+        "First_Name": name_parts["first"],
+        "Last_Name": last_names,
+        "Centre": centres,
+        "Room": rooms,
+        "Error": errors,
+    }, index=df.index)
+
+
+def row_errors(df):
+    """(row number, student, error) for every row of a prepared sheet that failed validation"""
+    invalid = df[df["Error"] != ""]
+    return list(zip((invalid.index + 1).tolist(), invalid["Student"].tolist(), invalid["Error"].tolist()))
+
+
+def export_row_errors(path, errors):
+    """Write (row number, student, error) rows as a CSV report, or .xlsx when path ends in .xlsx"""
+    report = pd.DataFrame(errors, columns=["Row", "Student", "Error"])
+    if path.lower().endswith(".xlsx"):
+        report.to_excel(path, index=False)
+    else:
+        report.to_csv(path, index=False)
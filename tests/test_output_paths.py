@@ -0,0 +1,117 @@
+import os
+import random
+from docgen_manifest import FolderManifest
+from docgen_pipeline import OutputPathIndex
+
+
+def touch(folder, *names):
+    for name in names:
+        with open(os.path.join(folder, name), "w"):
+            pass
+
+
+def probe(folder, file_name):
+    """The original per-document lookup: the first of name, name_1, name_2... not on disk"""
+    output_path = os.path.join(folder, file_name)
+    counter = 1
+    while os.path.exists(output_path):
+        output_path = os.path.join(folder, f"{file_name[:-5]}_{counter}.docx")
+        counter += 1
+    touch(folder, os.path.basename(output_path))
+    return output_path
+
+
+def test_claim_numbers_around_existing_files(tmp_path):
+    paths = OutputPathIndex(str(tmp_path))
+    folder = paths.folder("Apr", 2026, 21)
+    touch(folder, "a.docx", "a_2.docx")
+    paths = OutputPathIndex(str(tmp_path))
+    folder = paths.folder("Apr", 2026, 21)
+    claimed = [os.path.basename(paths.claim(folder, name)) for name in ["a.docx", "b.docx", "a.docx", "a.docx", "b.docx"]]
+    assert claimed == ["a_1.docx", "b.docx", "a_3.docx", "a_4.docx", "b_1.docx"]
+
+
+def test_claim_matches_probing_the_disk(tmp_path):
+    rng = random.Random(0)
+    for trial in range(20):
+        existing = [name for name in ["a.docx"] + [f"a_{n}.docx" for n in range(1, 6)] if rng.random() < 0.5]
+        names = [rng.choice(["a.docx", "b.docx"]) for _ in range(8)]
+        probed_dir = tmp_path / f"probed{trial}"
+        probed_dir.mkdir()
+        touch(str(probed_dir), *existing)
+        expected = [os.path.basename(probe(str(probed_dir), name)) for name in names]
+
+        paths = OutputPathIndex(str(tmp_path / f"planned{trial}"))
+        touch(paths.folder("Apr", 2026, 21), *existing)
+        paths = OutputPathIndex(str(tmp_path / f"planned{trial}"))
+        folder = paths.folder("Apr", 2026, 21)
+        assert [os.path.basename(paths.claim(folder, name)) for name in names] == expected
+
+
+def test_claim_with_another_extension(tmp_path):
+    paths = OutputPathIndex(str(tmp_path), extension=".pdf")
+    folder = paths.folder("Apr", 2026, 21)
+    assert [os.path.basename(paths.claim(folder, "a.docx")) for _ in range(2)] == ["a.pdf", "a_1.pdf"]
+
+
+TEMPLATE_DIGEST = "0" * 64
+
+
+def run(tmp_path, rows, force=False, confirm=True):
+    """Plan (file name, {{Name}}) rows like an incremental run; returns the planned names, None if skipped"""
+    paths = OutputPathIndex(str(tmp_path), TEMPLATE_DIGEST, force)
+    folder = paths.folder("Apr", 2026, 21)
+    planned = []
+    for file_name, values in rows:
+        output_path = paths.plan(folder, file_name, {"{{Name}}": values})
+        planned.append(None if output_path is None else os.path.basename(output_path))
+        if output_path is not None:
+            touch(folder, os.path.basename(output_path))
+            if confirm:
+                paths.complete(output_path)
+    paths.save()
+    return planned
+
+
+ROWS = [("a.docx", "Ann"), ("a.docx", "Al"), ("b.docx", "Bo")]
+
+
+def test_unchanged_rerun_skips_every_document(tmp_path):
+    assert run(tmp_path, ROWS) == ["a.docx", "a_1.docx", "b.docx"]
+    assert run(tmp_path, ROWS) == [None, None, None]
+
+
+def test_edited_row_is_rendered_into_the_same_file(tmp_path):
+    run(tmp_path, ROWS)
+    assert run(tmp_path, [("a.docx", "Ann"), ("a.docx", "Alan"), ("b.docx", "Bo")]) == [None, "a_1.docx", None]
+
+
+def test_deleted_document_is_rendered_again(tmp_path):
+    run(tmp_path, ROWS)
+    os.remove(os.path.join(OutputPathIndex(str(tmp_path), create_folders=False).folder("Apr", 2026, 21), "b.docx"))
+    assert run(tmp_path, ROWS) == [None, None, "b.docx"]
+
+
+def test_unconfirmed_document_is_rendered_again(tmp_path):
+    # hash None: planned, but the run stopped before the write was confirmed
+    assert run(tmp_path, ROWS, confirm=False) == ["a.docx", "a_1.docx", "b.docx"]
+    manifest = FolderManifest(OutputPathIndex(str(tmp_path), create_folders=False).folder("Apr", 2026, 21))
+    assert [entry["hash"] for entry in manifest.entries.values()] == [None, None, None]
+    assert run(tmp_path, ROWS) == ["a.docx", "a_1.docx", "b.docx"]
+    assert run(tmp_path, ROWS) == [None, None, None]
+
+
+def test_force_renders_every_document_in_place(tmp_path):
+    run(tmp_path, ROWS)
+    assert run(tmp_path, ROWS, force=True) == ["a.docx", "a_1.docx", "b.docx"]
+
+
+def test_manifest_names_stay_reserved(tmp_path):
+    run(tmp_path, ROWS)
+    folder = OutputPathIndex(str(tmp_path), create_folders=False).folder("Apr", 2026, 21)
+    os.remove(os.path.join(folder, "a_1.docx"))
+    paths = OutputPathIndex(str(tmp_path), TEMPLATE_DIGEST)
+    folder = paths.folder("Apr", 2026, 21)
+    # a_1.docx belongs to the second "a" row even while it is missing
+    assert os.path.basename(paths.claim(folder, "a.docx")) == "a_2.docx"
+    assert os.path.basename(paths.claim(folder, "c.docx")) == "c.docx"
@@ -0,0 +1,101 @@
+import os
+import zipfile
+from datetime import datetime
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from docgen_metrics import RunMetrics
+from docgen_pipeline import ArchiveWriter, OutputPathIndex, build_jobs, render_jobs
+from docgen_sheet import apply_date, initialize_df
+from synthetic import make_master_sheet
+
+EXAM_DATE = datetime(2026, 4, 21)
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template.docx")
+
+
+def plan(raw, tmp_path, rows=None, create_folders=False):
+    df = apply_date(initialize_df(raw), EXAM_DATE).iloc[:rows]
+    return build_jobs(df, str(tmp_path), OutputPathIndex(str(tmp_path), create_folders=create_folders))
+
+
+def test_build_jobs_plans_every_row(tmp_path):
+    jobs, skipped = plan(make_master_sheet(20), tmp_path)
+    assert len(jobs) == 20
+    assert skipped == []
+
+
+def test_build_jobs_no_rows(tmp_path):
+    assert plan(make_master_sheet(3), tmp_path, rows=0) == ([], [])
+
+
+def test_build_jobs_every_student_blank(tmp_path):
+    raw = make_master_sheet(3)
+    raw["Student"] = None
+    jobs, skipped = plan(raw, tmp_path)
+    assert jobs == []
+    assert [(row, error) for row, _, error in skipped] == [(row, "Missing Student") for row in (1, 2, 3)]
+
+
+def test_archive_writer_caps_open_archives(tmp_path):
+    jobs = [
+        SimpleNamespace(centre="1", room=room, output_path=str(tmp_path / f"{room} {n}.docx"))
+        for n in range(3) for room in ("A", "B", "C")
+    ]
+    with ArchiveWriter(str(tmp_path), "room", max_open=2) as archive:
+        for job in jobs:
+            archive.add(job, job.output_path.encode())
+            assert len(archive.archives) <= 2
+    assert len(archive.paths) == 3
+    for path, room in zip(archive.paths, ("A", "B", "C")):
+        with zipfile.ZipFile(path) as zin:
+            assert zin.namelist() == [f"{room} {n}.docx" for n in range(3)]
+
+
+def test_booking_without_a_centre_is_archived_as_unknown(tmp_path):
+    raw = make_master_sheet(1)
+    raw.loc[0, "Room Booking"] = "Main Hall 101"
+    (job,), skipped = plan(raw, tmp_path)
+    assert skipped == []
+    assert ArchiveWriter(str(tmp_path), "room").archive_name(job) == "Cover Sheets - Centre unknown Room 101.zip"
+
+
+def test_repeated_rows_are_planned_as_copies(tmp_path):
+    raw = make_master_sheet(5)
+    raw = pd.concat([raw, raw.iloc[[0, 0, 3]]], ignore_index=True)
+    jobs, _ = plan(raw, tmp_path)
+    assert [job.original.index if job.original else None for job in jobs] == [None] * 5 + [0, 0, 3]
+    assert [job.copies for job in jobs[:5]] == [2, 0, 0, 1, 0]
+
+
+@pytest.mark.parametrize("workers, stream", [(1, False), (1, True), (2, True)])
+def test_copies_are_written_from_the_first_document(tmp_path, workers, stream):
+    raw = make_master_sheet(300)
+    raw = pd.concat([raw, raw.iloc[:100]], ignore_index=True)
+    jobs, _ = plan(raw, tmp_path, create_folders=True)
+    metrics = RunMetrics()
+    results = []
+    written = render_jobs(iter(jobs) if stream else jobs, "native", TEMPLATE, workers,
+                          lambda job, error: results.append((job, error)), metrics=metrics)
+    assert written == 400
+    assert sorted(job.index for job, error in results if error is None) == list(range(400))
+    assert metrics.to_dict()["counters"]["documents_reused"] == 100
+    for job in jobs[300:]:
+        with open(job.output_path, "rb") as copy, open(job.original.output_path, "rb") as original:
+            assert copy.read() == original.read()
+
+
+def test_copies_are_archived(tmp_path):
+    raw = make_master_sheet(20)
+    raw = pd.concat([raw, raw.iloc[:5]], ignore_index=True)
+    jobs, _ = plan(raw, tmp_path)
+    metrics = RunMetrics()
+    with ArchiveWriter(str(tmp_path), "room") as archive:
+        assert render_jobs(jobs, "native", TEMPLATE, metrics=metrics, archive=archive) == 25
+    assert metrics.to_dict()["counters"]["documents_reused"] == 5
+    entries = 0
+    for path in archive.paths:
+        with zipfile.ZipFile(path) as zin:
+            assert zin.testzip() is None
+            entries += len(zin.namelist())
+    assert entries == 25
@@ -0,0 +1,156 @@
+import io
+import os
+import re
+import zipfile
+from xml.dom import minidom
+import pytest
+from docgen_render import LOCAL_HEADER, MergedTemplate, TemplatePlan
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template.docx")
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def make_docx(body):
+    """Smallest package TemplatePlan accepts, with body as the paragraphs of word/document.xml"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zout:
+        zout.writestr("[Content_Types].xml", "<Types/>")
+        zout.writestr("word/document.xml", f"<w:document {W}><w:body>{body}<w:sectPr/></w:body></w:document>")
+        zout.writestr("word/styles.xml", f"<w:styles {W}/>")
+    return output.getvalue()
+
+
+def read_part(data, name):
+    with zipfile.ZipFile(io.BytesIO(data)) as zin:
+        return zin.read(name).decode("utf-8")
+
+
+def raw_members(data):
+    """Compressed bytes of every member, as stored in the package"""
+    members = {}
+    with zipfile.ZipFile(io.BytesIO(data)) as zin:
+        for info in zin.infolist():
+            fields = LOCAL_HEADER.unpack_from(data, info.header_offset)
+            start = info.header_offset + LOCAL_HEADER.size + fields[9] + fields[10]
+            members[info.filename] = data[start:start + info.compress_size]
+    return members
+
+
+def test_renders_the_template():
+    with open(TEMPLATE, "rb") as f:
+        template = f.read()
+    plan = TemplatePlan(template)
+    assert plan.placeholders == ["{{Name}}", "{{ID}}", "{{Course}}", "{{Date}}"]
+    data = plan.render({"{{Name}}": "Ann Lee", "{{ID}}": 300000001, "{{Course}}": "MATH 101", "{{Date}}": "April 21"})
+    with zipfile.ZipFile(io.BytesIO(data)) as zin:
+        assert zin.testzip() is None
+        text = "".join(zin.read(name).decode("utf-8") for name in zin.namelist() if name.startswith("word/"))
+        for name in zin.namelist():
+            if name.endswith(".xml"):
+                minidom.parseString(zin.read(name))
+    for value in ("Ann Lee", "300000001", "MATH 101", "April 21"):
+        assert value in text
+    assert "{{" not in text
+
+
+def test_static_members_are_copied_byte_for_byte():
+    with open(TEMPLATE, "rb") as f:
+        template = f.read()
+    plan = TemplatePlan(template)
+    dynamic = {member.name.decode("utf-8") for member in plan.members if member.slots is not None}
+    source = raw_members(template)
+    output = raw_members(plan.render({"{{Name}}": "Ann Lee"}))
+    assert list(output) == list(source)
+    assert dynamic
+    for name in source:
+        if name not in dynamic:
+            assert output[name] == source[name], name
+
+
+def test_placeholder_split_across_runs():
+    data = TemplatePlan(make_docx("<w:p><w:r><w:t>{{Na</w:t></w:r><w:r><w:t>me}} x</w:t></w:r></w:p>")).render(
+        {"{{Name}}": "Ann Lee"}
+    )
+    document = read_part(data, "word/document.xml")
+    # Both runs keep their spaces: the value in the first, the text left over in the second
+    assert '<w:t xml:space="preserve">Ann Lee</w:t>' in document
+    assert '<w:t xml:space="preserve"> x</w:t>' in document
+
+
+def test_placeholders_in_separate_paragraphs_are_not_joined():
+    plan = TemplatePlan(make_docx("<w:p><w:r><w:t>{{Na</w:t></w:r></w:p><w:p><w:r><w:t>me}}</w:t></w:r></w:p>"))
+    assert plan.placeholders == []
+
+
+def test_values_are_escaped():
+    data = TemplatePlan(make_docx("<w:p><w:r><w:t>{{Name}}</w:t></w:r></w:p>")).render({"{{Name}}": "A & B <C>"})
+    document = read_part(data, "word/document.xml")
+    assert "A &amp; B &lt;C&gt;" in document
+    assert minidom.parseString(document).getElementsByTagName("w:t")[0].firstChild.data == "A & B <C>"
+
+
+def test_output_is_a_valid_zip():
+    plan = TemplatePlan(make_docx("<w:p><w:r><w:t>{{Name}} and {{ID}}</w:t></w:r></w:p>"))
+    for value in ("Ann", "Émilie Ôtis", "x" * 10000):
+        data = plan.render({"{{Name}}": value, "{{ID}}": 1})
+        with zipfile.ZipFile(io.BytesIO(data)) as zin:
+            assert zin.testzip() is None
+            assert zin.namelist() == ["[Content_Types].xml", "word/document.xml", "word/styles.xml"]
+        assert f"{value} and 1" in read_part(data, "word/document.xml")
+
+
+def merge(count):
+    template = MergedTemplate.from_file(TEMPLATE)
+    return template.render([{"{{Name}}": f"Student {n}", "{{ID}}": n} for n in range(1, count + 1)])
+
+
+def test_merged_document_has_a_section_per_cover_sheet():
+    data = merge(3)
+    document = read_part(data, "word/document.xml")
+    assert document.count("<w:sectPr") == 3
+    # Every section but the last closes with a paragraph holding its section properties
+    assert document.count("<w:pPr><w:sectPr") == 2
+
+
+def test_merged_document_has_one_header_copy_per_section():
+    data = merge(3)
+    with zipfile.ZipFile(io.BytesIO(data)) as zin:
+        names = zin.namelist()
+    assert "word/header2.xml" not in names
+    assert [name for name in names if name.startswith("word/header2-")] == [f"word/header2-{n}.xml" for n in range(1, 4)]
+    for n in range(1, 4):
+        header = read_part(data, f"word/header2-{n}.xml")
+        assert f"Student {n}" in header and "{{Name}}" not in header
+    # Headers without placeholders stay shared
+    assert "word/header1.xml" in names
+
+
+def test_merged_document_rewrites_relationships_and_content_types():
+    data = merge(2)
+    relationships = read_part(data, "word/_rels/document.xml.rels")
+    content_types = read_part(data, "[Content_Types].xml")
+    document = read_part(data, "word/document.xml")
+    assert 'Target="header2.xml"' not in relationships
+    assert "/word/header2.xml" not in content_types
+    for n in (1, 2):
+        assert f'Id="rId9s{n}"' in relationships and f'Target="header2-{n}.xml"' in relationships
+        assert f'PartName="/word/header2-{n}.xml"' in content_types
+        assert f'r:id="rId9s{n}"' in document
+    assert 'r:id="rId9"' not in document
+    ids = re.findall(r'Relationship Id="([^"]+)"', relationships)
+    assert len(ids) == len(set(ids))
+
+
+def test_merged_document_is_well_formed():
+    data = merge(2)
+    with zipfile.ZipFile(io.BytesIO(data)) as zin:
+        assert zin.testzip() is None
+        for name in zin.namelist():
+            if name.endswith((".xml", ".rels")):
+                minidom.parseString(zin.read(name))
+
+
+def test_merged_document_needs_a_cover_sheet():
+    with pytest.raises(ValueError, match="at least one"):
+        MergedTemplate.from_file(TEMPLATE).render([])
@@ -0,0 +1,98 @@
+import pandas as pd
+from docgen_sheet import PREPARED_COLUMNS, _extract, export_row_errors, initialize_df, row_errors
+from synthetic import make_master_sheet
+
+
+def test_valid_sheet_has_no_errors():
+    df = initialize_df(make_master_sheet(50))
+    assert list(df.columns) == PREPARED_COLUMNS
+    assert row_errors(df) == []
+
+
+def test_sheet_without_data_rows():
+    df = initialize_df(make_master_sheet(0))
+    assert df.empty
+    assert list(df.columns) == PREPARED_COLUMNS
+
+
+def test_blank_rows_are_dropped():
+    raw = make_master_sheet(3)
+    raw.loc[1] = None
+    df = initialize_df(raw)
+    assert list(df.index) == [0, 2]
+    assert row_errors(df) == []
+
+
+def test_only_blank_rows():
+    raw = make_master_sheet(3)
+    raw[:] = None
+    assert initialize_df(raw).empty
+
+
+def test_invalid_rows_are_reported():
+    raw = make_master_sheet(6)
+    raw.loc[1, "Student ID"] = "12A45"
+    raw.loc[2, "Student ID"] = "100.5"
+    raw.loc[3, "Course"] = "MATH"
+    raw.loc[4, "Student"] = "  "
+    raw.loc[5, "Exam Type"] = None
+    errors = {row: error for row, _, error in row_errors(initialize_df(raw))}
+    assert errors == {
+        2: 'Unparsable Student ID "12A45"',
+        3: 'Unparsable Student ID "100.5"',
+        4: 'Malformed Course "MATH"',
+        5: "Missing Student",
+        6: "Missing Exam Type",
+    }
+
+
+def test_bookings_without_a_centre_are_kept():
+    raw = make_master_sheet(3)
+    raw.loc[0, "Room Booking"] = "Main Hall 101"
+    raw.loc[1, "Room Booking"] = "Gym"
+    raw.loc[2, "Room Booking"] = "Testing  Centre  TC4   210"
+    df = initialize_df(raw)
+    assert row_errors(df) == []
+    assert df["Centre"].tolist() == ["", "", "4"]
+    assert df["Room"].tolist() == ["101", "Gym", "210"]
+
+
+def test_several_problems_in_one_row():
+    raw = make_master_sheet(1)
+    raw.loc[0, "Course"] = "MATH"
+    raw.loc[0, "Student ID"] = None
+    assert row_errors(initialize_df(raw)) == [
+        (1, raw.loc[0, "Student"].strip(), 'Missing Student ID; Malformed Course "MATH"')
+    ]
+
+
+def test_every_student_blank():
+    raw = make_master_sheet(3)
+    raw["Student"] = None
+    df = initialize_df(raw)
+    assert [error for _, _, error in row_errors(df)] == ["Missing Student"] * 3
+    assert (df["Last_Name"] == "").all()
+
+
+def test_numeric_ids_in_a_text_column_are_kept():
+    # openpyxl gives ints and strings in one object column
+    raw = make_master_sheet(2)
+    raw["Student ID"] = pd.Series([300000000, "bad"], dtype=object)
+    df = initialize_df(raw)
+    assert df.loc[0, "ID"] == 300000000
+    assert row_errors(df)[0][2] == 'Unparsable Student ID "bad"'
+
+
+def test_export_row_errors(tmp_path):
+    path = tmp_path / "errors.csv"
+    export_row_errors(str(path), [(4, "Ann Lee", 'Malformed Course "MATH"')])
+    assert pd.read_csv(path).to_dict("records") == [{"Row": 4, "Student": "Ann Lee", "Error": 'Malformed Course "MATH"'}]
+
+
+def test_extract_matches_on_every_storage():
+    pattern = r"^(?:(?:.*\s)?(?P<centre>\S+)\s+)?(?P<room>\S+)$"
+    values = ["Testing  Centre  TC4   210", "Gym", "", None]
+    expected = {"centre": ["TC4", "", "", ""], "room": ["210", "Gym", "", ""]}
+    for dtype in (object, "str", pd.StringDtype("python")):
+        parts = _extract(pd.Series(values, dtype=dtype), pattern)
+        assert parts.astype(object).to_dict("list") == expected
@@ -0,0 +1,36 @@
+import json
+from docgen_cli import main
+from docgen_sheet import iter_master_sheet, load_master_sheet
+from synthetic import write_master_sheet
+
+BLANK_ROW = ",,,,,,,,,,,,,\n"
+
+
+def sheet_with_trailing_blank_rows(tmp_path, rows, blank_rows):
+    path = write_master_sheet(str(tmp_path / "master.csv"), rows)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(BLANK_ROW * blank_rows)
+    return path
+
+
+def test_trailing_blank_chunk_is_skipped(tmp_path):
+    path = sheet_with_trailing_blank_rows(tmp_path, 10, 3)
+    chunks = list(iter_master_sheet(path, 10))
+    assert [len(chunk) for chunk in chunks] == [10]
+
+
+def test_partial_last_chunk(tmp_path):
+    path = sheet_with_trailing_blank_rows(tmp_path, 25, 3)
+    chunks = list(iter_master_sheet(path, 10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [index for chunk in chunks for index in chunk.index] == list(load_master_sheet(path).index)
+
+
+def test_cli_streams_sheet_with_trailing_blank_rows(tmp_path, capsys):
+    path = sheet_with_trailing_blank_rows(tmp_path, 10, 3)
+    code = main([path, "--output", str(tmp_path / "out"), "--date", "2026-04-21", "--workers", "1",
+                 "--stream", "--chunk-rows", "10"])
+    summary = json.loads(capsys.readouterr().out)
+    assert code == 0
+    assert summary["documents"] == 10
+    assert summary["skipped_rows"] == []
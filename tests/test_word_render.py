@@ -0,0 +1,186 @@
+import os
+import threading
+import pytest
+from docgen_render import WordRenderer
+
+
+class FakeStory:
+    def __init__(self, document):
+        self.document = document
+        self.NextStoryRange = None
+        self.Find = self
+
+    def Execute(self, FindText, ReplaceWith, **options):
+        self.document.replaced[FindText] = ReplaceWith
+        return True
+
+
+class FakeDocument:
+    def __init__(self, application):
+        self.application = application
+        self.replaced = {}
+        self.StoryRanges = [FakeStory(self)]
+
+    def Sections(self, index):
+        return self
+
+    def Headers(self, index):
+        return self
+
+    @property
+    def Range(self):
+        return self
+
+    StoryType = 1
+
+    def SaveAs(self, path, FileFormat):
+        if self.application.step == "bad document":
+            raise ValueError("The document is corrupt")
+        with open(path, "w") as f:
+            f.write(repr(sorted(self.replaced.items())))
+
+    def Close(self, SaveChanges):
+        pass
+
+
+class FakeWord:
+    """Word.Application stand-in; steps script what each Documents.Open does"""
+    def __init__(self, word, pid):
+        self.word = word
+        self.pid = pid
+        self.step = "ok"
+        self.crashed = False
+        self.quit = False
+        self.killed = threading.Event()
+        self.Documents = self
+
+    @property
+    def Count(self):
+        if self.crashed or self.killed.is_set():
+            raise OSError("The RPC server is unavailable")
+        return 0
+
+    def Open(self, path, **options):
+        self.step = self.word.steps.pop(0) if self.word.steps else "ok"
+        if self.step == "crash":
+            self.crashed = True
+            raise OSError("The RPC server is unavailable")
+        if self.step == "hang":
+            self.killed.wait()
+            raise OSError("The remote procedure call failed")
+        return FakeDocument(self)
+
+    def Quit(self, SaveChanges):
+        self.quit = True
+
+
+class Word:
+    """application_factory handing out fake Word processes; kills go through os.kill"""
+    def __init__(self, steps=()):
+        self.steps = list(steps)
+        self.applications = []
+
+    def __call__(self):
+        application = FakeWord(self, pid=1000 + len(self.applications))
+        self.applications.append(application)
+        return application, application.pid
+
+    def kill(self, pid, sig):
+        self.applications[pid - 1000].killed.set()
+
+
+@pytest.fixture
+def word(monkeypatch):
+    def make(steps=()):
+        word = Word(steps)
+        monkeypatch.setattr(os, "kill", word.kill)
+        return word
+    return make
+
+
+def render(renderer, tmp_path, count):
+    paths = [str(tmp_path / f"{n}.docx") for n in range(count)]
+    for n, path in enumerate(paths):
+        renderer.render({"{{Name}}": f"Student {n}"}, path)
+    return paths
+
+
+def test_renders_through_word(word, tmp_path):
+    fake = word()
+    renderer = WordRenderer("template.docx", application_factory=fake)
+    path, = render(renderer, tmp_path, 1)
+    renderer.close()
+    with open(path) as f:
+        assert f.read() == repr([("{{Name}}", "Student 0")])
+    assert len(fake.applications) == 1
+    assert fake.applications[0].quit
+
+
+def test_recycles_word_after_recycle_after_documents(word, tmp_path):
+    fake = word()
+    renderer = WordRenderer("template.docx", recycle_after=2, application_factory=fake)
+    render(renderer, tmp_path, 5)
+    renderer.close()
+    assert len(fake.applications) == 3
+    assert all(application.quit for application in fake.applications)
+    assert renderer.restarts == 2
+
+
+def test_retries_after_word_crashes(word, tmp_path):
+    fake = word(["crash"])
+    renderer = WordRenderer("template.docx", application_factory=fake)
+    path, = render(renderer, tmp_path, 1)
+    renderer.close()
+    assert os.path.exists(path)
+    assert len(fake.applications) == 2
+    assert fake.applications[0].killed.is_set()
+
+
+def test_gives_up_after_retries(word, tmp_path):
+    fake = word(["crash"] * 3)
+    renderer = WordRenderer("template.docx", retries=2, application_factory=fake)
+    with pytest.raises(RuntimeError, match="Word failed 3 times"):
+        render(renderer, tmp_path, 1)
+    renderer.close()
+    assert len(fake.applications) == 3
+
+
+def test_bad_document_is_not_retried(word, tmp_path):
+    fake = word(["bad document"])
+    renderer = WordRenderer("template.docx", application_factory=fake)
+    with pytest.raises(ValueError, match="corrupt"):
+        render(renderer, tmp_path, 1)
+    # Word itself is fine, so the session is kept for the next document
+    render(renderer, tmp_path, 1)
+    renderer.close()
+    assert len(fake.applications) == 1
+
+
+def test_hung_word_is_killed_and_retried(word, tmp_path):
+    fake = word(["hang"])
+    renderer = WordRenderer("template.docx", timeout=0.1, application_factory=fake)
+    path, = render(renderer, tmp_path, 1)
+    renderer.close()
+    assert os.path.exists(path)
+    assert fake.applications[0].killed.is_set()
+    assert len(fake.applications) == 2
+
+
+def test_word_without_a_pid_is_refused(word):
+    fake = word()
+
+    def factory():
+        application, _ = fake()
+        return application, None
+
+    with pytest.raises(RuntimeError, match="process id"):
+        WordRenderer("template.docx", application_factory=factory)
+    assert fake.applications[0].quit
+
+
+def test_hang_on_every_attempt_times_out(word, tmp_path):
+    fake = word(["hang"] * 2)
+    renderer = WordRenderer("template.docx", timeout=0.1, retries=1, application_factory=fake)
+    with pytest.raises(RuntimeError, match="within 0.1s"):
+        render(renderer, tmp_path, 1)
+    renderer.close()